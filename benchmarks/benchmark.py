@@ -0,0 +1,366 @@
+''' Benchmarks of the dataset and preprocessing hot paths.
+
+Run the suite and save the results:
+
+    python benchmark.py run -o results.json
+
+Compare the results against a baseline, flagging regressions:
+
+    python benchmark.py compare baseline.json results.json
+'''
+import json
+import platform
+import sys
+import tempfile
+import tracemalloc
+from argparse import ArgumentParser
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter, process_time
+from typing import Any, Callable
+
+import pandas as pd
+import pyarrow as pa
+from car_prices.dataset import (DATASET_FORMATS, ExperimentConfig,
+                                fetch_car_dataset, load_car_dataset,
+                                load_car_dataset_split, load_datasets,
+                                save_datasets, split_train_test,
+                                split_train_test_and_save,
+                                split_train_test_by_hash)
+from dotenv import dotenv_values
+from lab01.config import DATA_DIR as HOUSING_DATA_DIR
+from lab01.dataloader import load_housing_data
+from lab01.preprocess import preprocess_data, preprocess_data_fast
+
+_CAR_PRICES_SCRIPTS_DIR = Path(__file__).resolve().parents[1] \
+    / 'projects' / 'car_prices' / 'scripts'
+sys.path.insert(0, str(_CAR_PRICES_SCRIPTS_DIR))
+
+# pylint: disable=wrong-import-position
+from show_dataset_info import compute_stats  # noqa: E402
+
+DEFAULT_THRESHOLD = 0.10
+
+# A benchmark case is prepared by a function that receives the scaled car
+# and housing datasets and a scratch directory, and returns the function
+# to be measured.
+SetupType = Callable[[pd.DataFrame, pd.DataFrame, Path], Callable[[], Any]]
+
+
+@dataclass
+class Result:
+    '''Dataclass for storing the measurements of a benchmark case.
+    '''
+    name: str
+    scale: int
+    rows: int
+    wall_time_s: float
+    cpu_time_s: float
+    peak_memory_mb: float
+
+
+def _write_car_dataset(car_data: pd.DataFrame, data_dir: Path) -> None:
+    project_dir = data_dir / 'car_price'
+    project_dir.mkdir(parents=True, exist_ok=True)
+    car_data.to_csv(project_dir / 'car_price_dataset.csv', index=False)
+
+
+def _setup_load_car_dataset(car_data, _, tmp_dir):
+    _write_car_dataset(car_data, tmp_dir)
+    return lambda: load_car_dataset(tmp_dir, cache=False)
+
+
+def _setup_split_train_test(car_data, _, __):
+    return lambda: split_train_test(car_data, test_size=0.2, random_state=42)
+
+
+def _setup_split_train_test_by_hash(car_data, _, __):
+    return lambda: split_train_test_by_hash(
+        car_data,
+        test_size=0.2,
+        random_state=42,
+    )
+
+
+def _make_setup_save_datasets(dataset_format: str) -> SetupType:
+
+    def setup(car_data, _, tmp_dir):
+        train_data, test_data = split_train_test(car_data, 0.2, 42)
+        return lambda: save_datasets(
+            train_data,
+            test_data,
+            tmp_dir,
+            dataset_format=dataset_format,
+        )
+
+    return setup
+
+
+def _make_setup_load_datasets(dataset_format: str) -> SetupType:
+
+    def setup(car_data, _, tmp_dir):
+        train_data, test_data = split_train_test(car_data, 0.2, 42)
+        save_datasets(train_data, test_data, tmp_dir, dataset_format)
+        return lambda: load_datasets(tmp_dir, dataset_format=dataset_format)
+
+    return setup
+
+
+def _make_setup_load_car_dataset_split(index_only: bool) -> SetupType:
+
+    def setup(car_data, _, tmp_dir):
+        _write_car_dataset(car_data, tmp_dir)
+        metadata = ExperimentConfig(
+            test_size=0.2,
+            random_state=42,
+            index_only=index_only,
+        )
+        split_train_test_and_save(car_data, metadata, tmp_dir)
+        return lambda: load_car_dataset_split(tmp_dir)
+
+    return setup
+
+
+def _setup_compute_stats(car_data, _, __):
+    return lambda: compute_stats(car_data)
+
+
+def _setup_preprocess_data(_, housing_data, __):
+    return lambda: preprocess_data(housing_data)
+
+
+def _setup_preprocess_data_fast(_, housing_data, __):
+    return lambda: preprocess_data_fast(housing_data)
+
+
+BENCHMARKS: dict[str, SetupType] = {
+    'load_car_dataset': _setup_load_car_dataset,
+    'split_train_test': _setup_split_train_test,
+    'split_train_test_by_hash': _setup_split_train_test_by_hash,
+    **{
+        f'save_datasets[{dataset_format}]':
+            _make_setup_save_datasets(dataset_format)
+        for dataset_format in DATASET_FORMATS
+    },
+    **{
+        f'load_datasets[{dataset_format}]':
+            _make_setup_load_datasets(dataset_format)
+        for dataset_format in DATASET_FORMATS
+    },
+    'load_car_dataset_split':
+        _make_setup_load_car_dataset_split(index_only=False),
+    'load_car_dataset_split[index_only]':
+        _make_setup_load_car_dataset_split(index_only=True),
+    'compute_stats': _setup_compute_stats,
+    'preprocess_data': _setup_preprocess_data,
+    'preprocess_data_fast': _setup_preprocess_data_fast,
+}
+
+
+def parse_args() -> dict:
+    ''' Parse command-line arguments. '''
+    parser = ArgumentParser()
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Run the benchmarks')
+    run_parser.add_argument(
+        '--car-data-dir',
+        type=Path,
+        default=dotenv_values().get('DATA_DIR'),
+        help='Directory containing the car_price dataset',
+    )
+    run_parser.add_argument(
+        '--housing-data-dir',
+        type=Path,
+        default=HOUSING_DATA_DIR,
+        help='Directory containing the housing dataset',
+    )
+    run_parser.add_argument(
+        '-o',
+        '--output',
+        type=Path,
+        default=Path('benchmark_results.json'),
+        help='Results file',
+    )
+    run_parser.add_argument(
+        '-s',
+        '--scale',
+        type=int,
+        nargs='+',
+        default=[1, 10],
+        help='Number of copies of the datasets',
+    )
+    run_parser.add_argument(
+        '-r',
+        '--repeat',
+        type=int,
+        default=3,
+        help='Number of timed runs (the fastest one is kept)',
+    )
+    run_parser.add_argument(
+        '-k',
+        '--select',
+        type=str,
+        default=None,
+        help='Only run the benchmarks whose name contains this string',
+    )
+
+    compare_parser = subparsers.add_parser(
+        'compare',
+        help='Compare results against a baseline',
+    )
+    compare_parser.add_argument('baseline', type=Path, help='Baseline file')
+    compare_parser.add_argument('results', type=Path, help='Results file')
+    compare_parser.add_argument(
+        '-t',
+        '--threshold',
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help='Relative increase flagged as a regression',
+    )
+    return vars(parser.parse_args())
+
+
+def load_source_data(
+    car_data_dir: Path,
+    housing_data_dir: Path,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    ''' Load the car and housing datasets. '''
+    car_data = pd.read_csv(fetch_car_dataset(car_data_dir))
+    housing_data = load_housing_data(housing_data_dir, cache=False)
+    return car_data, housing_data
+
+
+def scale_data(data: pd.DataFrame, scale: int) -> pd.DataFrame:
+    ''' Replicate the dataset scale times. '''
+    return pd.concat([data] * scale, ignore_index=True)
+
+
+def measure(function: Callable[[], Any], repeat: int) -> tuple[float, ...]:
+    '''Measure the wall time, CPU time and peak memory of a function.
+
+    The times are the ones of the fastest run. The peak memory is measured
+    in a separate run and adds up the allocations traced by tracemalloc
+    (Python, NumPy and pandas) and the ones of the Arrow memory pool.
+    '''
+    timings = []
+    for _ in range(repeat):
+        start_wall, start_cpu = perf_counter(), process_time()
+        function()
+        timings.append((perf_counter() - start_wall, process_time() - start_cpu))
+    wall_time, cpu_time = min(timings)
+
+    default_pool = pa.default_memory_pool()
+    arrow_pool = pa.proxy_memory_pool(default_pool)
+    pa.set_memory_pool(arrow_pool)
+    tracemalloc.start()
+    try:
+        function()
+        _, traced_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        pa.set_memory_pool(default_pool)
+    peak_memory = traced_peak + arrow_pool.max_memory()
+
+    return wall_time, cpu_time, peak_memory
+
+
+def run(options: dict) -> None:
+    ''' Run the benchmarks and save the results. '''
+    car_data, housing_data = load_source_data(
+        options['car_data_dir'],
+        options['housing_data_dir'],
+    )
+    selected = {
+        name: setup for name, setup in BENCHMARKS.items()
+        if options['select'] is None or options['select'] in name
+    }
+
+    results = []
+    for scale in options['scale']:
+        scaled_car_data = scale_data(car_data, scale)
+        scaled_housing_data = scale_data(housing_data, scale)
+        for name, setup in selected.items():
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                function = setup(
+                    scaled_car_data,
+                    scaled_housing_data,
+                    Path(tmp_dir),
+                )
+                wall_time, cpu_time, peak_memory = measure(
+                    function,
+                    options['repeat'],
+                )
+            rows = len(scaled_housing_data) \
+                if name.startswith('preprocess') else len(scaled_car_data)
+            result = Result(
+                name=name,
+                scale=scale,
+                rows=rows,
+                wall_time_s=wall_time,
+                cpu_time_s=cpu_time,
+                peak_memory_mb=peak_memory / 2**20,
+            )
+            print(f'{name} (x{scale}): {wall_time:.4f}s wall, '
+                  f'{cpu_time:.4f}s CPU, {result.peak_memory_mb:.1f} MB')
+            results.append(result)
+
+    content = {
+        'metadata': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pandas': pd.__version__,
+            'repeat': options['repeat'],
+        },
+        'results': [asdict(result) for result in results],
+    }
+    with open(options['output'], 'w', encoding='utf8') as output_file:
+        json.dump(content, output_file, indent=4)
+
+
+def _load_results(filepath: Path) -> pd.DataFrame:
+    with open(filepath, 'r', encoding='utf8') as results_file:
+        content = json.load(results_file)
+    return pd.DataFrame(content['results']).set_index(['name', 'scale'])
+
+
+def compare(options: dict) -> bool:
+    '''Compare results against a baseline.
+
+    Returns whether any benchmark case regressed, i.e. its wall time or peak
+    memory grew by more than the threshold.
+    '''
+    baseline = _load_results(options['baseline'])
+    results = _load_results(options['results'])
+    metrics = ['wall_time_s', 'cpu_time_s', 'peak_memory_mb']
+    comparison = baseline[metrics].join(
+        results[metrics],
+        lsuffix='_baseline',
+        how='inner',
+    )
+    for metric in metrics:
+        comparison[f'{metric}_change'] = \
+            comparison[metric] / comparison[f'{metric}_baseline'] - 1
+    threshold = options['threshold']
+    comparison['regression'] = \
+        (comparison['wall_time_s_change'] > threshold) | \
+        (comparison['peak_memory_mb_change'] > threshold)
+
+    columns = [f'{metric}_change' for metric in metrics] + ['regression']
+    print(comparison[columns].round(3).to_string())
+    return bool(comparison['regression'].any())
+
+
+# pylint: disable=missing-function-docstring
+def main():
+    options = parse_args()
+    if options['command'] == 'run':
+        run(options)
+    elif compare(options):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
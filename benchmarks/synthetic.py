@@ -0,0 +1,261 @@
+''' Synthetic datasets with the schema of a real one, at any size.
+
+Learn the profile of a dataset (the marginal distribution of every column):
+
+    python synthetic.py profile car_price_dataset.csv car_price.json
+
+Generate 10M rows from it, as Parquet shards of 1M rows, on 4 processes:
+
+    python synthetic.py generate car_price.json output_dir -n 10000000 -j 4
+
+Columns are sampled independently: numerical ones from their empirical
+quantile function and categorical ones (including numerical columns with few
+distinct values, like a year) from their value frequencies. The output only
+depends on the profile, the number of rows, the shard size and the seed, and
+each process only ever holds one shard in memory.
+'''
+import json
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+QUANTILE_COUNT = 1001
+MAX_DISCRETE_VALUES = 50
+DEFAULT_SHARD_ROWS = 1_000_000
+OUTPUT_FORMATS = ['csv', 'parquet']
+
+
+def parse_args() -> dict:
+    ''' Parse command-line arguments. '''
+    parser = ArgumentParser()
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    profile_parser = subparsers.add_parser(
+        'profile',
+        help='Learn the profile of a dataset',
+    )
+    profile_parser.add_argument('source', type=Path, help='Dataset CSV')
+    profile_parser.add_argument('profile', type=Path, help='Profile file')
+
+    generate_parser = subparsers.add_parser(
+        'generate',
+        help='Generate a synthetic dataset from a profile',
+    )
+    generate_parser.add_argument('profile', type=Path, help='Profile file')
+    generate_parser.add_argument(
+        'output_dir',
+        type=Path,
+        help='Directory of the shards',
+    )
+    generate_parser.add_argument(
+        '-n',
+        '--rows',
+        type=int,
+        required=True,
+        help='Number of rows',
+    )
+    generate_parser.add_argument(
+        '-s',
+        '--shard-rows',
+        type=int,
+        default=DEFAULT_SHARD_ROWS,
+        help='Number of rows per shard',
+    )
+    generate_parser.add_argument(
+        '-f',
+        '--format',
+        choices=OUTPUT_FORMATS,
+        default='parquet',
+        help='Format of the shards',
+    )
+    generate_parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+        help='Seed of the random generator',
+    )
+    generate_parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=1,
+        help='Number of processes',
+    )
+    return vars(parser.parse_args())
+
+
+def _profile_column(column: pd.Series) -> dict:
+    values = column.dropna()
+    profile = {
+        'name': column.name,
+        'dtype': str(column.dtype),
+        'missing': float(column.isna().mean()),
+    }
+    is_numeric = pd.api.types.is_numeric_dtype(column)
+    if is_numeric and values.nunique() > MAX_DISCRETE_VALUES:
+        quantiles = values.quantile(np.linspace(0, 1, QUANTILE_COUNT))
+        profile['kind'] = 'numerical'
+        profile['integer'] = pd.api.types.is_integer_dtype(column)
+        profile['quantiles'] = quantiles.tolist()
+    else:
+        frequencies = values.value_counts(normalize=True, sort=False)
+        profile['kind'] = 'categorical'
+        profile['values'] = frequencies.index.tolist()
+        profile['probabilities'] = frequencies.tolist()
+    return profile
+
+
+def profile_dataset(data: pd.DataFrame) -> dict:
+    '''Learns the marginal distribution of every column of a dataset.
+
+    Args:
+        data: The dataset.
+
+    Returns:
+        A JSON-serializable profile of the dataset.
+    '''
+    return {
+        'columns': [_profile_column(data[name]) for name in data.columns],
+    }
+
+
+def _sample_column(
+    profile: dict,
+    rows: int,
+    rng: np.random.Generator,
+) -> pd.Series:
+    if profile['kind'] == 'numerical':
+        levels = np.linspace(0, 1, len(profile['quantiles']))
+        values = np.interp(rng.random(rows), levels, profile['quantiles'])
+        if profile['integer']:
+            values = np.round(values)
+    else:
+        probabilities = np.asarray(profile['probabilities'])
+        codes = rng.choice(
+            len(probabilities),
+            size=rows,
+            p=probabilities / probabilities.sum(),
+        )
+        values = np.asarray(profile['values'])[codes]
+
+    missing = rng.random(rows) < profile['missing']
+    column = pd.Series(values, name=profile['name'])
+    if missing.any():
+        return column.mask(missing)
+    return column.astype(profile['dtype'])
+
+
+def generate_shard(
+    profile: dict,
+    rows: int,
+    seed: np.random.SeedSequence,
+) -> pd.DataFrame:
+    '''Samples a synthetic dataset from a profile.
+
+    Args:
+        profile: The profile of the dataset, from profile_dataset.
+        rows: The number of rows.
+        seed: The seed of the random generator.
+
+    Returns:
+        A pandas DataFrame with the columns of the profiled dataset.
+    '''
+    rng = np.random.default_rng(seed)
+    columns = [
+        _sample_column(column_profile, rows, rng)
+        for column_profile in profile['columns']
+    ]
+    return pd.concat(columns, axis=1)
+
+
+def _write_shard(
+    profile: dict,
+    rows: int,
+    seed: np.random.SeedSequence,
+    path: Path,
+    output_format: str,
+) -> Path:
+    shard = generate_shard(profile, rows, seed)
+    if output_format == 'csv':
+        shard.to_csv(path, index=False)
+    else:
+        shard.to_parquet(path, index=False)
+    return path
+
+
+def generate_dataset(
+    profile: dict,
+    output_dir: Path,
+    rows: int,
+    shard_rows: int = DEFAULT_SHARD_ROWS,
+    output_format: str = 'parquet',
+    seed: int = 42,
+    jobs: int = 1,
+) -> list[Path]:
+    '''Writes a synthetic dataset as shards.
+
+    Each shard gets its own seed, spawned from the given one, so the output
+    does not depend on the number of processes.
+
+    Args:
+        profile: The profile of the dataset, from profile_dataset.
+        output_dir: The directory of the shards.
+        rows: The number of rows.
+        shard_rows: The number of rows of each shard.
+        output_format: The format of the shards, 'csv' or 'parquet'.
+        seed: The seed of the random generator.
+        jobs: The number of processes.
+
+    Returns:
+        The paths of the shards.
+    '''
+    output_dir.mkdir(parents=True, exist_ok=True)
+    shard_count = -(-rows // shard_rows)
+    seeds = np.random.SeedSequence(seed).spawn(shard_count)
+    shard_sizes = [
+        min(shard_rows, rows - i * shard_rows) for i in range(shard_count)
+    ]
+    paths = [
+        output_dir / f'part-{i:05d}.{output_format}'
+        for i in range(shard_count)
+    ]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(
+            _write_shard,
+            [profile] * shard_count,
+            shard_sizes,
+            seeds,
+            paths,
+            [output_format] * shard_count,
+        ))
+
+
+# pylint: disable=missing-function-docstring
+def main():
+    options = parse_args()
+    if options['command'] == 'profile':
+        profile = profile_dataset(pd.read_csv(options['source']))
+        with open(options['profile'], 'w', encoding='utf8') as profile_file:
+            json.dump(profile, profile_file, indent=4)
+        return
+
+    with open(options['profile'], 'r', encoding='utf8') as profile_file:
+        profile = json.load(profile_file)
+    paths = generate_dataset(
+        profile,
+        options['output_dir'],
+        options['rows'],
+        shard_rows=options['shard_rows'],
+        output_format=options['format'],
+        seed=options['seed'],
+        jobs=options['jobs'],
+    )
+    print(f'Wrote {options["rows"]} rows to {len(paths)} shards in '
+          f'{options["output_dir"]}')
+
+
+if __name__ == '__main__':
+    main()
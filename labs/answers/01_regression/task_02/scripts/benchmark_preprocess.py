@@ -0,0 +1,112 @@
+'''Benchmark the vectorized pre-processing against the original one. '''
+import tracemalloc
+from argparse import ArgumentParser
+from pathlib import Path
+from time import perf_counter
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+from lab01.config import DATA_DIR
+from lab01.dataloader import load_housing_data
+from lab01.preprocess import preprocess_data, preprocess_data_fast
+
+
+def parse_args() -> dict:
+    ''' Parse command-line arguments. '''
+    parser = ArgumentParser()
+    parser.add_argument(
+        '-d',
+        '--data-dir',
+        type=Path,
+        default=DATA_DIR,
+        help='Directory containing housing.csv',
+    )
+    parser.add_argument(
+        '-s',
+        '--scale',
+        type=int,
+        nargs='+',
+        default=[1, 10, 50],
+        help='Scale factors of the dataset',
+    )
+    parser.add_argument(
+        '-r',
+        '--repeat',
+        type=int,
+        default=3,
+        help='Number of timed runs (the best one is reported)',
+    )
+    return vars(parser.parse_args())
+
+
+def scale_data(data: pd.DataFrame, scale: int) -> pd.DataFrame:
+    '''Replicates the dataset scale times.
+
+    The coordinates of each copy are shifted slightly, so that the copies
+    are not removed as duplicates.
+    '''
+    copies = []
+    for i in range(scale):
+        copy = data.copy()
+        copy['longitude'] += i * 1e-4
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def measure(
+    function: Callable[[pd.DataFrame], pd.DataFrame],
+    data: pd.DataFrame,
+    repeat: int,
+) -> tuple[pd.DataFrame, float, int]:
+    '''Returns the result, the best wall time and the peak memory of a run.
+    '''
+    times = []
+    for _ in range(repeat):
+        start_time = perf_counter()
+        result = function(data)
+        times.append(perf_counter() - start_time)
+
+    tracemalloc.start()
+    function(data)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, min(times), peak_memory
+
+
+# pylint: disable=missing-function-docstring
+def main():
+    options = parse_args()
+    data = load_housing_data(options['data_dir'])
+
+    rows = []
+    for scale in options['scale']:
+        scaled_data = scale_data(data, scale)
+        expected, time_original, memory_original = measure(
+            preprocess_data,
+            scaled_data,
+            options['repeat'],
+        )
+        result, time_fast, memory_fast = measure(
+            preprocess_data_fast,
+            scaled_data,
+            options['repeat'],
+        )
+        pd.testing.assert_frame_equal(result, expected, check_exact=True)
+        rows.append({
+            'rows': len(scaled_data),
+            'time_original_s': time_original,
+            'time_fast_s': time_fast,
+            'speedup': time_original / time_fast,
+            'peak_memory_original_mb': memory_original / 2**20,
+            'peak_memory_fast_mb': memory_fast / 2**20,
+            'memory_ratio': memory_original / np.maximum(memory_fast, 1),
+        })
+
+    print('Outputs are equal.\n')
+    print(pd.DataFrame(rows).round(3).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
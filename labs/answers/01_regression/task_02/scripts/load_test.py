@@ -0,0 +1,113 @@
+'''Benchmark the inference server with concurrent clients. '''
+import json
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from time import perf_counter
+from urllib.request import Request, urlopen
+
+import numpy as np
+from lab01.config import DATA_DIR
+from lab01.dataloader import load_preprocessed_data
+from lab01.features import TARGET_COLUMN
+
+
+def parse_args() -> dict:
+    ''' Parse command-line arguments. '''
+    parser = ArgumentParser()
+    parser.add_argument(
+        '-u',
+        '--url',
+        type=str,
+        default='http://127.0.0.1:8000',
+        help='URL of the inference server',
+    )
+    parser.add_argument(
+        '-d',
+        '--data-dir',
+        type=Path,
+        default=DATA_DIR,
+        help='Directory containing preprocessed_data.csv',
+    )
+    parser.add_argument(
+        '-c',
+        '--concurrency',
+        type=int,
+        default=16,
+        help='Number of concurrent clients',
+    )
+    parser.add_argument(
+        '-n',
+        '--requests',
+        type=int,
+        default=2000,
+        help='Total number of requests',
+    )
+    parser.add_argument(
+        '-r',
+        '--rows',
+        type=int,
+        default=1,
+        help='Number of rows per request',
+    )
+    return vars(parser.parse_args())
+
+
+def make_payloads(
+    data_dir: Path,
+    n_requests: int,
+    rows: int,
+) -> list[bytes]:
+    ''' Make request bodies from rows of the pre-processed dataset. '''
+    data = load_preprocessed_data(data_dir).drop(columns=[TARGET_COLUMN])
+    records = json.loads(data.to_json(orient='records'))
+    rng = np.random.default_rng(42)
+    return [
+        json.dumps([records[i] for i in rng.integers(len(records), size=rows)
+                    ]).encode('utf8') for _ in range(n_requests)
+    ]
+
+
+def post(url: str, payload: bytes) -> float:
+    ''' Post a request and return its latency, in seconds. '''
+    request = Request(
+        url,
+        data=payload,
+        headers={'Content-Type': 'application/json'},
+    )
+    start_time = perf_counter()
+    with urlopen(request) as response:
+        response.read()
+    return perf_counter() - start_time
+
+
+# pylint: disable=missing-function-docstring
+def main():
+    options = parse_args()
+    payloads = make_payloads(
+        options['data_dir'],
+        options['requests'],
+        options['rows'],
+    )
+    predict_url = f'{options["url"]}/predict'
+
+    start_time = perf_counter()
+    with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+        latencies = np.array(list(executor.map(
+            lambda payload: post(predict_url, payload),
+            payloads,
+        )))
+    elapsed_time = perf_counter() - start_time
+
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    print(f'Client: {len(latencies)} requests in {elapsed_time:.2f}s, '
+          f'{len(latencies) / elapsed_time:.1f} requests/s, '
+          f'p50 {p50:.2f}ms, p99 {p99:.2f}ms')
+
+    with urlopen(f'{options["url"]}/metrics') as response:
+        metrics = json.loads(response.read())
+    print('Server:', json.dumps(metrics, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,22 +1,97 @@
 '''Preprocess the data and save it to the data directory. '''
+from argparse import ArgumentParser
 from pathlib import Path
 
 from lab01.config import DATA_DIR
-from lab01.dataloader import load_housing_data, save_preprocessed_data
-from lab01.preprocess import preprocess_data
+from lab01.dataloader import (PREPROCESSED_FILENAME, iter_housing_data,
+                              load_housing_data, save_preprocessed_data,
+                              save_preprocessed_data_chunks)
+from lab01.features import (FEATURES_FILENAME, MANIFEST_FILENAME,
+                            TARGET_FILENAME, compile_preprocessed_data)
+from lab01.preprocess import preprocess_data_chunks, preprocess_data_fast
+from lab01.stages import Stage, run_stages
+
+
+def make_stages(data_dir: Path) -> list[Stage]:
+    '''Make the stages of the preprocessing pipeline.'''
+    compiled_dir = data_dir / 'compiled'
+    return [
+        Stage(
+            name='load',
+            function=load_housing_data,
+            params={'data_dir': data_dir, 'cache': False},
+            inputs=[data_dir / 'housing.csv', data_dir / 'housing.tgz'],
+        ),
+        Stage(
+            name='preprocess',
+            function=preprocess_data_fast,
+        ),
+        Stage(
+            name='save',
+            function=save_preprocessed_data,
+            params={'output_dir': data_dir},
+            outputs=[data_dir / PREPROCESSED_FILENAME],
+        ),
+        Stage(
+            name='compile',
+            function=compile_preprocessed_data,
+            params={'data_dir': data_dir, 'output_dir': compiled_dir},
+            inputs=[data_dir / PREPROCESSED_FILENAME],
+            outputs=[
+                compiled_dir / FEATURES_FILENAME,
+                compiled_dir / TARGET_FILENAME,
+                compiled_dir / MANIFEST_FILENAME,
+            ],
+        ),
+    ]
 
 
 def pipeline(data_dir: Path) -> None:
-    '''Preprocess the data and save it to the data directory.'''
-    data = load_housing_data(data_dir)
-    preprocessed_data = preprocess_data(data)
-    save_preprocessed_data(preprocessed_data, data_dir)
+    '''Preprocess the data and save it to the data directory.
+
+    Stages whose inputs, code and parameters did not change since the last
+    run are skipped.
+    '''
+    stages = make_stages(data_dir)
+    executed = run_stages(stages, data_dir / 'cache' / 'stages')
+    for stage in stages:
+        status = 'done' if stage.name in executed else 'up to date'
+        print(f'{stage.name}: {status}')
+
+
+def streaming_pipeline(data_dir: Path, chunksize: int) -> None:
+    '''Preprocess the data chunk by chunk and save it to the data directory.
+
+    Memory use is bounded by the chunk size, plus one hash per kept row to
+    remove duplicates across chunks.
+    '''
+    chunks = iter_housing_data(data_dir, chunksize)
+    preprocessed_chunks = preprocess_data_chunks(chunks)
+    save_preprocessed_data_chunks(preprocessed_chunks, data_dir)
+    compile_preprocessed_data(data_dir, data_dir / 'compiled', chunksize)
+
+
+def parse_args() -> dict:
+    ''' Parse command-line arguments. '''
+    parser = ArgumentParser()
+    parser.add_argument(
+        '-c',
+        '--chunksize',
+        type=int,
+        default=None,
+        help='Process the data in chunks of this many rows',
+    )
+    return vars(parser.parse_args())
 
 
 # pylint: disable=missing-function-docstring
 def main():
+    options = parse_args()
     data_dir = DATA_DIR
-    pipeline(data_dir)
+    if options['chunksize']:
+        streaming_pipeline(data_dir, options['chunksize'])
+    else:
+        pipeline(data_dir)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,97 @@
+'''Tune the regressors by successive halving and write a leaderboard. '''
+from argparse import ArgumentParser
+from pathlib import Path
+
+from lab01.config import DATA_DIR
+from lab01.dataloader import load_preprocessed_data
+from lab01.features import TARGET_COLUMN
+from lab01.search import (default_search_space, sample_candidates,
+                          successive_halving)
+from sklearn.model_selection import train_test_split
+
+
+def parse_args() -> dict:
+    ''' Parse command-line arguments. '''
+    parser = ArgumentParser()
+    parser.add_argument(
+        '-d',
+        '--data-dir',
+        type=Path,
+        default=DATA_DIR,
+        help='Directory containing preprocessed_data.csv',
+    )
+    parser.add_argument(
+        '-n',
+        '--candidates',
+        type=int,
+        default=10,
+        help='Number of candidates per regressor',
+    )
+    parser.add_argument(
+        '-t',
+        '--time-budget',
+        type=float,
+        default=None,
+        help='Time budget of the search, in seconds',
+    )
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=None,
+        help='Number of processes (default: one per CPU)',
+    )
+    parser.add_argument(
+        '--factor',
+        type=int,
+        default=3,
+        help='Reduction factor: 1/factor of the candidates are kept at '
+        'each round',
+    )
+    parser.add_argument(
+        '--min-rows',
+        type=int,
+        default=500,
+        help='Number of training rows of the first round',
+    )
+    return vars(parser.parse_args())
+
+
+# pylint: disable=missing-function-docstring
+def main():
+    options = parse_args()
+    data_dir = options['data_dir']
+    data = load_preprocessed_data(data_dir)
+    X = data.drop(columns=[TARGET_COLUMN])
+    y = data[TARGET_COLUMN]
+    X_train, _, y_train, _ = train_test_split(
+        X,
+        y,
+        test_size=0.25,
+        random_state=42,
+    )
+
+    candidates = sample_candidates(
+        default_search_space(),
+        options['candidates'],
+    )
+    leaderboard = successive_halving(
+        X_train,
+        y_train,
+        candidates,
+        cache_dir=data_dir / 'cache' / 'models',
+        factor=options['factor'],
+        min_rows=options['min_rows'],
+        time_budget=options['time_budget'],
+        jobs=options['jobs'],
+    )
+
+    output_path = data_dir / 'search' / 'leaderboard.csv'
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    leaderboard.to_csv(output_path, index=False)
+    print(leaderboard.head(10).round(4).to_string())
+    print(f'\nLeaderboard written to {output_path}')
+
+
+if __name__ == '__main__':
+    main()
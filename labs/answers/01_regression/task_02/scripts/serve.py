@@ -0,0 +1,74 @@
+'''Serve the saved housing model over HTTP/JSON, with micro-batching. '''
+from argparse import ArgumentParser
+from pathlib import Path
+
+from lab01.serving import (DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_WAIT,
+                           make_server)
+
+DEFAULT_MODEL_PATH = Path(__file__).resolve().parents[1] \
+    / 'notebooks' / '02-modeling' / 'modelo.joblib'
+
+
+def parse_args() -> dict:
+    ''' Parse command-line arguments. '''
+    parser = ArgumentParser()
+    parser.add_argument(
+        '-m',
+        '--model',
+        type=Path,
+        default=DEFAULT_MODEL_PATH,
+        help='Joblib file of the fitted model',
+    )
+    parser.add_argument(
+        '--host',
+        type=str,
+        default='127.0.0.1',
+        help='Address to listen on',
+    )
+    parser.add_argument(
+        '-p',
+        '--port',
+        type=int,
+        default=8000,
+        help='Port to listen on',
+    )
+    parser.add_argument(
+        '-b',
+        '--max-batch-size',
+        type=int,
+        default=DEFAULT_MAX_BATCH_SIZE,
+        help='Maximum number of rows of a micro-batch',
+    )
+    parser.add_argument(
+        '-w',
+        '--max-wait',
+        type=float,
+        default=DEFAULT_MAX_WAIT,
+        help='Maximum time, in seconds, a request waits for others',
+    )
+    return vars(parser.parse_args())
+
+
+# pylint: disable=missing-function-docstring
+def main():
+    options = parse_args()
+    server, batcher = make_server(
+        options['model'],
+        host=options['host'],
+        port=options['port'],
+        max_batch_size=options['max_batch_size'],
+        max_wait=options['max_wait'],
+    )
+    print(f'Serving {options["model"]} on '
+          f'http://{options["host"]}:{options["port"]}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.close()
+
+
+if __name__ == '__main__':
+    main()
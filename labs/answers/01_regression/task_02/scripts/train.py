@@ -0,0 +1,117 @@
+'''Train the candidate regressors on a shared pre-processing. '''
+from argparse import ArgumentParser
+from pathlib import Path
+
+import pandas as pd
+from lab01.cache import compute_fingerprint
+from lab01.config import DATA_DIR
+from lab01.dataloader import PREPROCESSED_FILENAME, load_preprocessed_data
+from lab01.features import TARGET_COLUMN
+from lab01.pipelines import make_preprocessing_pipe, make_regressors
+from lab01.registry import ModelRegistry
+from lab01.trainer import train_models
+from sklearn.metrics import root_mean_squared_error
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+
+
+def parse_args() -> dict:
+    ''' Parse command-line arguments. '''
+    parser = ArgumentParser()
+    parser.add_argument(
+        '-d',
+        '--data-dir',
+        type=Path,
+        default=DATA_DIR,
+        help='Directory containing preprocessed_data.csv',
+    )
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=None,
+        help='Number of processes (default: one per CPU)',
+    )
+    parser.add_argument(
+        '--test-size',
+        type=float,
+        default=0.25,
+        help='Fraction of the data held out for testing',
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+        help='Seed of the train/test split',
+    )
+    parser.add_argument(
+        '--save-best',
+        action='store_true',
+        help='Fit the best pipeline and store it in the model registry',
+    )
+    return vars(parser.parse_args())
+
+
+def save_best(
+    results: pd.DataFrame,
+    split: tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series],
+    data_dir: Path,
+    split_config: dict,
+) -> None:
+    ''' Fit the pipeline of the best regressor and store it in the registry.
+    '''
+    X_train, X_test, y_train, y_test = split
+    best_name = results.loc[results['rmse_test'].idxmin(), 'name']
+    pipeline = Pipeline([
+        ('preprocessing', make_preprocessing_pipe()),
+        ('regression', make_regressors()[best_name]),
+    ])
+
+    def train(model: Pipeline) -> dict:
+        model.fit(X_train, y_train)
+        return {
+            'name': best_name,
+            'rmse_test': root_mean_squared_error(y_test, model.predict(X_test)),
+        }
+
+    registry = ModelRegistry(data_dir / 'models')
+    data_fingerprint = compute_fingerprint(data_dir / PREPROCESSED_FILENAME)
+    _, trained = registry.get_or_train(
+        data_fingerprint.sha256,
+        split_config,
+        pipeline,
+        train,
+    )
+    status = 'trained and stored' if trained else 'already in the registry'
+    print(f'\n{best_name}: {status}')
+
+
+# pylint: disable=missing-function-docstring
+def main():
+    options = parse_args()
+    data_dir = options['data_dir']
+    data = load_preprocessed_data(data_dir)
+    X = data.drop(columns=[TARGET_COLUMN])
+    y = data[TARGET_COLUMN]
+    split_config = {
+        'test_size': options['test_size'],
+        'random_state': options['seed'],
+    }
+    split = train_test_split(X, y, **split_config)
+    X_train, X_test, y_train, y_test = split
+    results = train_models(
+        X_train,
+        y_train,
+        X_test,
+        y_test,
+        cache_dir=data_dir / 'cache' / 'models',
+        jobs=options['jobs'],
+    )
+    print(results.round(4).set_index('name').transpose())
+
+    if options['save_best']:
+        save_best(results, split, data_dir, split_config)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,23 +1,103 @@
 '''Data loading utilities for the California Housing Prices dataset.
 '''
+import hashlib
+import json
+import os
 import tarfile
+from contextlib import contextmanager
 from pathlib import Path
+from typing import IO, Iterable, Iterator
 from urllib import request
 
 import pandas as pd
 
+from lab01.cache import cached_read
+
 HOUSING_URL = ('https://raw.githubusercontent.com/ageron/handson-ml2/'
                'master/datasets/housing/housing.tgz')
-
-
-def fetch_housing_data(data_dir: Path) -> None:
+# The SHA-256 of housing.csv, as found in the archive. It is checked instead
+# of the one of the archive, whose bytes depend on how it was compressed.
+HOUSING_SHA256 = \
+    '8a3727f4cf54ac1a327f69b1d5b4db54c5834ea81c6e4efc0d163300022a685e'
+PREPROCESSED_FILENAME = 'preprocessed_data.csv'
+_VERIFIED_FILENAME = 'housing.tgz.verified.json'
+
+
+@contextmanager
+def _open_housing_csv(tgz_path: Path) -> Iterator[IO[bytes]]:
+    '''Opens housing.csv inside the archive, without extracting it.'''
+    with tarfile.open(tgz_path, 'r:gz') as housing_tgz:
+        member = next(
+            (member for member in housing_tgz.getmembers()
+             if Path(member.name).name == 'housing.csv'),
+            None,
+        )
+        if member is None:
+            raise tarfile.ReadError(f'No housing.csv in {tgz_path}.')
+        yield housing_tgz.extractfile(member)
+
+
+def _archive_stat(tgz_path: Path) -> dict[str, int]:
+    stat = tgz_path.stat()
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _is_verified(tgz_path: Path, sha256: str) -> bool:
+    verified_path = tgz_path.with_name(_VERIFIED_FILENAME)
+    if not verified_path.exists():
+        return False
+    with open(verified_path, 'r', encoding='utf8') as f:
+        verified = json.load(f)
+    return verified == {**_archive_stat(tgz_path), 'sha256': sha256.lower()}
+
+
+def _save_verified(tgz_path: Path, sha256: str) -> None:
+    verified = {**_archive_stat(tgz_path), 'sha256': sha256.lower()}
+    with open(tgz_path.with_name(_VERIFIED_FILENAME), 'w',
+              encoding='utf8') as f:
+        json.dump(verified, f, indent=4)
+
+
+def _is_valid_archive(tgz_path: Path, sha256: str | None) -> bool:
+    if not tgz_path.exists():
+        return False
+    if sha256 is None:
+        return True
+    # An archive that passed the check is not decompressed to check it
+    # again, for as long as its size and modification time are unchanged.
+    # The record stays valid when a checked download is renamed in place.
+    if _is_verified(tgz_path, sha256):
+        return True
+    try:
+        with _open_housing_csv(tgz_path) as csv_file:
+            digest = hashlib.file_digest(csv_file, 'sha256').hexdigest()
+    except (tarfile.TarError, OSError, EOFError):
+        return False
+    if digest != sha256.lower():
+        return False
+    _save_verified(tgz_path, sha256)
+    return True
+
+
+def fetch_housing_data(
+    data_dir: Path,
+    sha256: str | None = HOUSING_SHA256,
+    extract: bool = True,
+) -> None:
     '''Downloads the California Housing Prices dataset.
 
     Downloads the California Housing Prices dataset from Aurelien Geron's
-    GitHub repository and saves it to the specified directory.
+    GitHub repository and saves it to the specified directory. The download
+    is skipped if the archive is already there and matches the checksum.
 
     Args:
         data_dir: The directory to which the dataset will be saved.
+        sha256: The expected SHA-256 of housing.csv in the archive, or None
+            to accept any existing archive. An existing archive that does not
+            match it is downloaded again; a downloaded archive that does not
+            match it is deleted and a ValueError is raised.
+        extract: Whether to extract housing.csv from the archive. The loaders
+            can read it straight from the archive.
 
     Returns:
         None
@@ -25,31 +105,82 @@ def fetch_housing_data(data_dir: Path) -> None:
     if not data_dir.exists():
         data_dir.mkdir(parents=True)
 
-    # Fetch the housing data.
+    # Fetch the housing data, unless it is already there.
     tgz_path = data_dir / 'housing.tgz'
-    request.urlretrieve(HOUSING_URL, tgz_path)
+    if not _is_valid_archive(tgz_path, sha256):
+        # Download to a temporary name, so that an interrupted download is
+        # never taken for a complete archive.
+        partial_path = data_dir / 'housing.tgz.part'
+        request.urlretrieve(HOUSING_URL, partial_path)
+        if not _is_valid_archive(partial_path, sha256):
+            partial_path.unlink()
+            raise ValueError(f'Checksum mismatch for {HOUSING_URL}.')
+        os.replace(partial_path, tgz_path)
 
     # Extract the housing data.
-    with tarfile.open(tgz_path) as housing_tgz:
-        housing_tgz.extractall(path=data_dir, filter='data')
+    if extract and not (data_dir / 'housing.csv').exists():
+        with tarfile.open(tgz_path) as housing_tgz:
+            housing_tgz.extractall(path=data_dir, filter='data')
 
 
-def load_housing_data(data_dir: Path) -> pd.DataFrame:
+def _read_housing_tarball(tgz_path: Path) -> pd.DataFrame:
+    with _open_housing_csv(tgz_path) as csv_file:
+        return pd.read_csv(csv_file)
+
+
+def load_housing_data(data_dir: Path, cache: bool = True) -> pd.DataFrame:
     '''Loads the California Housing Prices dataset.
 
     Loads the California Housing Prices dataset from the specified directory.
+    If housing.csv was not extracted, it is parsed straight from housing.tgz,
+    which is downloaded first if missing or corrupted.
 
     Args:
         data_dir: The directory from which the dataset will be loaded.
+        cache: Whether to reuse the dataset parsed by a previous call, for as
+            long as the source file is unchanged (see `lab01.cache.cached_read`).
 
     Returns:
         A pandas DataFrame containing the California Housing Prices dataset.
     '''
     csv_path = data_dir / 'housing.csv'
-    df = pd.read_csv(csv_path)
+    tgz_path = data_dir / 'housing.tgz'
+    if csv_path.exists():
+        path, reader = csv_path, pd.read_csv
+    else:
+        fetch_housing_data(data_dir, extract=False)
+        path, reader = tgz_path, _read_housing_tarball
+
+    if cache:
+        return cached_read(path, reader, data_dir / 'cache')
+    df = reader(path)
     return df
 
 
+def iter_housing_data(data_dir: Path, chunksize: int) -> Iterator[pd.DataFrame]:
+    '''Loads the California Housing Prices dataset in chunks.
+
+    Like `load_housing_data`, housing.tgz is downloaded first if housing.csv
+    was not extracted and the archive is missing or corrupted.
+
+    Args:
+        data_dir: The directory from which the dataset will be loaded.
+        chunksize: The number of rows of each chunk.
+
+    Yields:
+        pandas DataFrames with consecutive rows of the dataset.
+    '''
+    csv_path = data_dir / 'housing.csv'
+    if csv_path.exists():
+        with pd.read_csv(csv_path, chunksize=chunksize) as reader:
+            yield from reader
+    else:
+        fetch_housing_data(data_dir, extract=False)
+        with _open_housing_csv(data_dir / 'housing.tgz') as csv_file:
+            with pd.read_csv(csv_file, chunksize=chunksize) as reader:
+                yield from reader
+
+
 def save_preprocessed_data(data: pd.DataFrame, output_dir: Path) -> None:
     '''Saves the pre-processed California Housing Prices dataset to the output directory.
     
@@ -58,7 +189,7 @@ def save_preprocessed_data(data: pd.DataFrame, output_dir: Path) -> None:
         output_dir: The output directory.
     '''
     output_dir.mkdir(parents=True, exist_ok=True)
-    output_path = output_dir / 'preprocessed_data.csv'
+    output_path = output_dir / PREPROCESSED_FILENAME
     data.to_csv(output_path, index=False)
 
 
@@ -71,6 +202,26 @@ def load_preprocessed_data(input_dir: Path) -> pd.DataFrame:
     Returns:
         A pandas DataFrame containing the pre-processed California Housing Prices dataset.
     '''
-    input_path = input_dir / 'preprocessed_data.csv'
+    input_path = input_dir / PREPROCESSED_FILENAME
     df = pd.read_csv(input_path)
     return df
+
+
+def save_preprocessed_data_chunks(
+    chunks: Iterable[pd.DataFrame],
+    output_dir: Path,
+) -> None:
+    '''Saves the pre-processed California Housing Prices dataset chunk by chunk.
+
+    The chunks are appended to the same file as `save_preprocessed_data`,
+    so only one chunk has to be in memory at a time.
+
+    Args:
+        chunks: pandas DataFrames with consecutive rows of the pre-processed dataset.
+        output_dir: The output directory.
+    '''
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / PREPROCESSED_FILENAME
+    with open(output_path, 'w', encoding='utf8', newline='') as output_file:
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(output_file, index=False, header=(i == 0))
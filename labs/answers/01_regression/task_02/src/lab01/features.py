@@ -0,0 +1,176 @@
+'''Compiles the pre-processed dataset into memory-mappable arrays.
+
+The features are written as a contiguous float32 matrix and the target as a
+float64 vector, in NumPy's .npy format, with a JSON manifest describing the
+columns. Loading them is a memory map: training runs start instantly and
+parallel workers share the pages through the OS cache.
+'''
+import json
+from pathlib import Path
+from typing import Callable, Iterable
+
+import numpy as np
+import pandas as pd
+
+from lab01.dataloader import PREPROCESSED_FILENAME
+
+TARGET_COLUMN = 'log_median_house_value'
+FEATURES_FILENAME = 'features.npy'
+TARGET_FILENAME = 'target.npy'
+MANIFEST_FILENAME = 'manifest.json'
+DEFAULT_CHUNKSIZE = 100_000
+
+
+def _make_manifest(
+    chunks: Iterable[pd.DataFrame],
+    target_column: str,
+) -> dict:
+    n_rows = 0
+    source_columns = None
+    categories: dict[str, set] = {}
+    for chunk in chunks:
+        n_rows += len(chunk)
+        if source_columns is None:
+            source_columns = [
+                name for name in chunk.columns if name != target_column
+            ]
+            categories = {
+                name: set() for name in source_columns
+                if not pd.api.types.is_numeric_dtype(chunk[name])
+            }
+        for name, values in categories.items():
+            values.update(chunk[name].dropna().unique())
+    if source_columns is None:
+        raise ValueError('Cannot compile features from an empty dataset.')
+
+    columns = []
+    for name in source_columns:
+        if name in categories:
+            columns.extend(f'{name}_{value}'
+                           for value in sorted(categories[name]))
+        else:
+            columns.append(name)
+
+    return {
+        'n_rows': n_rows,
+        'source_columns': source_columns,
+        'categories': {
+            name: sorted(values) for name, values in categories.items()
+        },
+        'columns': columns,
+        'target': target_column,
+        'features_dtype': 'float32',
+        'target_dtype': 'float64',
+    }
+
+
+def _encode(chunk: pd.DataFrame, manifest: dict) -> np.ndarray:
+    blocks = []
+    for name in manifest['source_columns']:
+        if name in manifest['categories']:
+            blocks.extend(
+                (chunk[name] == value).to_numpy(dtype=np.float32)
+                for value in manifest['categories'][name])
+        else:
+            blocks.append(chunk[name].to_numpy(dtype=np.float32))
+    return np.column_stack(blocks)
+
+
+def _compile_chunks(
+    make_chunks: Callable[[], Iterable[pd.DataFrame]],
+    output_dir: Path,
+    target_column: str,
+) -> None:
+    # A first pass finds the number of rows and the categories, so that a
+    # second pass can fill the arrays in place, one chunk at a time.
+    manifest = _make_manifest(make_chunks(), target_column)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    features = np.lib.format.open_memmap(
+        output_dir / FEATURES_FILENAME,
+        mode='w+',
+        dtype=np.float32,
+        shape=(manifest['n_rows'], len(manifest['columns'])),
+    )
+    target = np.lib.format.open_memmap(
+        output_dir / TARGET_FILENAME,
+        mode='w+',
+        dtype=np.float64,
+        shape=(manifest['n_rows'],),
+    )
+    start = 0
+    for chunk in make_chunks():
+        end = start + len(chunk)
+        features[start:end] = _encode(chunk, manifest)
+        target[start:end] = chunk[target_column].to_numpy(dtype=np.float64)
+        start = end
+    features.flush()
+    target.flush()
+    del features, target
+
+    with open(output_dir / MANIFEST_FILENAME, 'w', encoding='utf8') as f:
+        json.dump(manifest, f, indent=4)
+
+
+def compile_features(
+    data: pd.DataFrame,
+    output_dir: Path,
+    target_column: str = TARGET_COLUMN,
+) -> None:
+    '''Compiles a pre-processed dataset into feature and target arrays.
+
+    Numerical columns are converted to float32 and categorical columns are
+    one-hot encoded, in the order of the dataset. The column names and
+    categories are written to the manifest.
+
+    Args:
+        data: A pandas DataFrame containing the pre-processed dataset.
+        output_dir: The output directory.
+        target_column: The name of the target column.
+    '''
+    _compile_chunks(lambda: [data], output_dir, target_column)
+
+
+def compile_preprocessed_data(
+    data_dir: Path,
+    output_dir: Path,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    target_column: str = TARGET_COLUMN,
+) -> None:
+    '''Compiles the saved pre-processed dataset chunk by chunk.
+
+    Same as `compile_features`, but reads the CSV written by
+    `save_preprocessed_data` in chunks, so only one chunk is in memory.
+
+    Args:
+        data_dir: The directory containing the pre-processed dataset.
+        output_dir: The output directory.
+        chunksize: The number of rows of each chunk.
+        target_column: The name of the target column.
+    '''
+    input_path = data_dir / PREPROCESSED_FILENAME
+    _compile_chunks(
+        lambda: pd.read_csv(input_path, chunksize=chunksize),
+        output_dir,
+        target_column,
+    )
+
+
+def load_compiled_features(
+    input_dir: Path,
+) -> tuple[np.ndarray, np.ndarray, dict]:
+    '''Loads the compiled feature and target arrays.
+
+    The arrays are memory-mapped read-only, not read into memory.
+
+    Args:
+        input_dir: The directory containing the compiled arrays.
+
+    Returns:
+        The features matrix, the target vector and the manifest, whose
+        'columns' entry names the columns of the features matrix.
+    '''
+    with open(input_dir / MANIFEST_FILENAME, 'r', encoding='utf8') as f:
+        manifest = json.load(f)
+    features = np.load(input_dir / FEATURES_FILENAME, mmap_mode='r')
+    target = np.load(input_dir / TARGET_FILENAME, mmap_mode='r')
+    return features, target, manifest
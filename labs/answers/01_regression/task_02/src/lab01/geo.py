@@ -0,0 +1,163 @@
+'''Geographical cluster features for the housing dataset.
+'''
+from pathlib import Path
+
+import numpy as np
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.metrics.pairwise import euclidean_distances
+from sklearn.neighbors import KDTree
+from sklearn.utils.validation import check_is_fitted, validate_data
+
+GEO_OUTPUTS = ['distance', 'similarity', 'nearest']
+
+
+class GeoClusters(TransformerMixin, BaseEstimator):
+    '''Clusters coordinates and describes each point by its clusters.
+
+    The clusters are found with mini-batch k-means, and the centroids are
+    indexed in a KD-tree, so that finding the nearest ones of a point costs
+    O(log n_clusters) instead of O(n_clusters). The 'nearest' and
+    'similarity' outputs only query the tree; the 'distance' output computes
+    all distances, like KMeans.
+
+    With the 'distance' output, this is only a drop-in replacement for
+    KMeans, with no speedup: it transforms exactly like KMeans, and on the
+    lab's dataset (about 18k rows, 50 clusters) KMeans fits as fast or
+    faster, since mini-batches only pay off on much larger datasets. The
+    tree only pays off with hundreds of clusters: for 360k points, the
+    'similarity' output is about 2x faster than 'distance' with 500
+    clusters and 6x faster with 2000, but slower with 50.
+
+    Args:
+        n_clusters: The number of clusters.
+        output: What to output for each point:
+            'distance': its distances to all centroids, like KMeans.transform.
+            'similarity': the RBF similarity exp(-gamma * d**2) to its
+                n_neighbors nearest centroids, and 0 for the other ones.
+            'nearest': the index of its nearest centroid.
+        gamma: The RBF coefficient, for the 'similarity' output.
+        n_neighbors: The number of nearest centroids, for the 'similarity'
+            output.
+        batch_size: The mini-batch size of the clustering.
+        init: Initial centroids, e.g. from a previous fit (see
+            `save_centroids`). A fit starting from them converges in a few
+            mini-batches.
+        random_state: The seed of the clustering.
+    '''
+
+    def __init__(
+        self,
+        n_clusters: int = 50,
+        output: str = 'distance',
+        gamma: float = 1.0,
+        n_neighbors: int = 5,
+        batch_size: int = 16384,
+        init: np.ndarray | None = None,
+        random_state: int | None = 42,
+    ) -> None:
+        self.n_clusters = n_clusters
+        self.output = output
+        self.gamma = gamma
+        self.n_neighbors = n_neighbors
+        self.batch_size = batch_size
+        self.init = init
+        self.random_state = random_state
+
+    def fit(self, X, y=None, sample_weight=None):
+        '''Finds the clusters of the coordinates X.'''
+        if self.output not in GEO_OUTPUTS:
+            raise ValueError(
+                f'Unknown output {self.output!r}, expected one of '
+                f'{GEO_OUTPUTS}.'
+            )
+        X = validate_data(self, X, dtype=np.float64)
+        if self.init is None:
+            kmeans = MiniBatchKMeans(
+                n_clusters=self.n_clusters,
+                batch_size=self.batch_size,
+                n_init=1,
+                random_state=self.random_state,
+            )
+        else:
+            kmeans = MiniBatchKMeans(
+                n_clusters=len(self.init),
+                init=np.asarray(self.init),
+                batch_size=self.batch_size,
+                n_init=1,
+                random_state=self.random_state,
+            )
+        kmeans.fit(X, sample_weight=sample_weight)
+        self._set_centroids(kmeans.cluster_centers_)
+        return self
+
+    def _set_centroids(self, centroids: np.ndarray) -> None:
+        self.cluster_centers_ = centroids
+        self.tree_ = KDTree(centroids)
+
+    def transform(self, X):
+        '''Describes the coordinates X by their clusters.'''
+        check_is_fitted(self)
+        X = validate_data(self, X, dtype=np.float64, reset=False)
+        if self.output == 'distance':
+            return euclidean_distances(X, self.cluster_centers_)
+        if self.output == 'nearest':
+            indices = self.tree_.query(X, k=1, return_distance=False)
+            return indices.astype(np.float64)
+
+        n_clusters = len(self.cluster_centers_)
+        k = min(self.n_neighbors, n_clusters)
+        distances, indices = self.tree_.query(X, k=k)
+        similarities = np.zeros((len(X), n_clusters))
+        np.put_along_axis(
+            similarities,
+            indices,
+            np.exp(-self.gamma * distances**2),
+            axis=1,
+        )
+        return similarities
+
+    def get_feature_names_out(self, input_features=None):
+        '''Names the output columns.'''
+        check_is_fitted(self)
+        if self.output == 'nearest':
+            return np.array(['cluster'], dtype=object)
+        prefix = 'distance' if self.output == 'distance' else 'similarity'
+        return np.array([
+            f'cluster_{i}_{prefix}' for i in range(len(self.cluster_centers_))
+        ], dtype=object)
+
+    def save_centroids(self, path: Path) -> None:
+        '''Saves the fitted centroids to a .npy file.'''
+        check_is_fitted(self)
+        np.save(path, self.cluster_centers_)
+
+    @classmethod
+    def from_centroids(cls, path: Path, **params) -> 'GeoClusters':
+        '''Makes a fitted transformer from centroids saved by `save_centroids`.
+
+        The transformer can transform right away. Refitting it starts the
+        clustering from the saved centroids.
+
+        Args:
+            path: The .npy file of the centroids.
+            **params: The other parameters of the transformer. n_clusters,
+                if given, must be the number of saved centroids, and init is
+                ignored: it is always the saved centroids.
+        '''
+        centroids = np.load(path)
+        n_clusters = params.pop('n_clusters', len(centroids))
+        if n_clusters != len(centroids):
+            raise ValueError(
+                f'n_clusters={n_clusters} does not match the '
+                f'{len(centroids)} centroids saved in {path}.'
+            )
+        params.pop('init', None)
+        transformer = cls(
+            n_clusters=n_clusters,
+            init=centroids,
+            **params,
+        )
+        transformer.n_features_in_ = centroids.shape[1]
+        transformer._set_centroids(centroids)
+        return transformer
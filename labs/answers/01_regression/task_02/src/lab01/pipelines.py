@@ -0,0 +1,106 @@
+'''Pre-processing pipeline and candidate regressors of the modeling notebook.
+'''
+from sklearn.base import RegressorMixin
+from sklearn.cluster import KMeans
+from sklearn.compose import ColumnTransformer
+from sklearn.dummy import DummyRegressor
+from sklearn.ensemble import (ExtraTreesRegressor,
+                              HistGradientBoostingRegressor,
+                              RandomForestRegressor)
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LinearRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import (OneHotEncoder, PolynomialFeatures,
+                                   StandardScaler)
+from sklearn.tree import DecisionTreeRegressor
+
+from lab01.geo import GeoClusters
+
+GEO_COLUMNS = [
+    'longitude',
+    'latitude',
+]
+
+NUMERICAL_COLUMNS = [
+    'housing_median_age',
+    'log_households',
+    'log_median_income',
+    'log_rooms_per_household',
+    'log_population_per_household',
+    'log_bedrooms_per_room',
+]
+
+CATEGORICAL_COLUMNS = [
+    'ocean_proximity',
+]
+
+
+def make_preprocessing_pipe(
+    n_clusters: int = 50,
+    degree: int = 3,
+    random_state: int | None = 42,
+    fast_geo: bool = False,
+) -> ColumnTransformer:
+    '''Makes the pre-processing pipeline of the modeling notebook.
+
+    Args:
+        n_clusters: The number of geographical clusters.
+        degree: The degree of the polynomial features.
+        random_state: The seed of the clustering.
+        fast_geo: Whether to cluster with `GeoClusters` (mini-batch k-means)
+            instead of KMeans. Both output the distances to the centroids;
+            at the lab's scale this is not faster (see `GeoClusters`).
+
+    Returns:
+        An unfitted ColumnTransformer.
+    '''
+    if fast_geo:
+        cluster = GeoClusters(n_clusters=n_clusters, random_state=random_state)
+    else:
+        cluster = KMeans(n_clusters=n_clusters, random_state=random_state)
+    geo_pipeline = Pipeline([
+        ('imputer', SimpleImputer(strategy='median')),
+        ('cluster', cluster),
+    ])
+
+    num_pipeline = Pipeline([
+        ('imputer', SimpleImputer(strategy='median')),
+        ('poly', PolynomialFeatures(degree=degree, include_bias=False)),
+        ('scaler', StandardScaler()),
+    ])
+
+    cat_pipeline = Pipeline([
+        ('encoder', OneHotEncoder(sparse_output=False)),
+    ])
+
+    return ColumnTransformer(
+        transformers=[
+            ('geo', geo_pipeline, GEO_COLUMNS),
+            ('num', num_pipeline, NUMERICAL_COLUMNS),
+            ('cat', cat_pipeline, CATEGORICAL_COLUMNS),
+        ],
+        remainder='passthrough',
+    )
+
+
+def make_regressors(random_state: int = 42) -> dict[str, RegressorMixin]:
+    '''Makes the candidate regressors of the modeling notebook.
+
+    The ensembles are single-threaded: parallelism comes from training the
+    candidates concurrently.
+
+    Args:
+        random_state: The seed of the regressors.
+
+    Returns:
+        The unfitted regressors, by name.
+    '''
+    return {
+        'Linear Regression': LinearRegression(),
+        'Decision Tree': DecisionTreeRegressor(random_state=random_state),
+        'Random Forest': RandomForestRegressor(random_state=random_state),
+        'Histogram Gradient Boosting': HistGradientBoostingRegressor(
+            random_state=random_state),
+        'Extra Trees': ExtraTreesRegressor(random_state=random_state),
+        'Dummy': DummyRegressor(strategy='mean'),
+    }
@@ -1,5 +1,7 @@
 '''Pre-processes the California Housing Prices dataset.
 '''
+from typing import Iterable, Iterator
+
 import numpy as np
 import pandas as pd
 
@@ -57,3 +59,98 @@ def preprocess_data(data: pd.DataFrame) -> pd.DataFrame:
     data = data[valid_rows]
 
     return data
+
+
+LOG_CUT_POINT = 2.0
+
+
+def preprocess_data_fast(data: pd.DataFrame) -> pd.DataFrame:
+    '''Pre-processes the California Housing Prices dataset, vectorized.
+
+    Produces the same result as `preprocess_data`, but all row filters
+    (duplicates, spikes, ISLAND and the log_households cut) are fused into a
+    single mask that is applied once, and the derived features and log
+    transformations are computed as vectorized operations over the kept
+    rows only. No intermediate DataFrame is built.
+
+    Args:
+        data: A pandas DataFrame containing the California Housing Prices dataset.
+
+    Returns:
+        A pandas DataFrame containing the pre-processed California Housing Prices dataset.
+    '''
+    return _preprocess_rows(data, ~data.duplicated().to_numpy())
+
+
+def _preprocess_rows(
+    data: pd.DataFrame,
+    unique_rows: np.ndarray,
+) -> pd.DataFrame:
+    households = data['households'].to_numpy()
+    median_income = data['median_income'].to_numpy()
+    median_house_value = data['median_house_value'].to_numpy()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_households = np.log10(households)
+
+    valid_rows = ((median_income < 15) &
+                  (data['housing_median_age'].to_numpy() < 52) &
+                  (median_house_value < 500001) &
+                  (data['ocean_proximity'] != 'ISLAND').to_numpy() &
+                  (log_households > LOG_CUT_POINT))
+    valid_rows &= unique_rows
+
+    households = households[valid_rows]
+    total_rooms = data['total_rooms'].to_numpy()[valid_rows]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        columns = {
+            'longitude': data['longitude'].to_numpy()[valid_rows],
+            'latitude': data['latitude'].to_numpy()[valid_rows],
+            'housing_median_age':
+                data['housing_median_age'].to_numpy()[valid_rows],
+            'ocean_proximity': data['ocean_proximity'].array[valid_rows],
+            'log_households': log_households[valid_rows],
+            'log_median_income': np.log10(median_income[valid_rows]),
+            'log_rooms_per_household': np.log10(total_rooms / households),
+            'log_population_per_household': np.log10(
+                data['population'].to_numpy()[valid_rows] / households),
+            'log_bedrooms_per_room': np.log10(
+                data['total_bedrooms'].to_numpy()[valid_rows] / total_rooms),
+            'log_median_house_value': np.log10(
+                median_house_value[valid_rows]),
+        }
+
+    # The arrays are new, so they can be used without copying them again.
+    return pd.DataFrame(columns, index=data.index[valid_rows], copy=False)
+
+
+def preprocess_data_chunks(
+    chunks: Iterable[pd.DataFrame],
+) -> Iterator[pd.DataFrame]:
+    '''Pre-processes the California Housing Prices dataset, chunk by chunk.
+
+    Applies the same steps as `preprocess_data` to each chunk, so only one
+    chunk has to be in memory at a time. Duplicates are also removed across
+    chunks: the 64-bit hash of every kept row is remembered, and later rows
+    with the same hash are dropped. Duplicate rows are either all valid or
+    all invalid, so only the hashes of valid rows need to be kept.
+
+    Args:
+        chunks: The chunks of the California Housing Prices dataset.
+
+    Yields:
+        The pre-processed chunks.
+    '''
+    seen_hashes = set()
+    for chunk in chunks:
+        hashes = pd.util.hash_pandas_object(chunk, index=False)
+        unique_rows = ~hashes.duplicated().to_numpy()
+        unique_rows &= np.fromiter(
+            (row_hash not in seen_hashes for row_hash in hashes.to_numpy()),
+            dtype=bool,
+            count=len(hashes),
+        )
+        preprocessed_chunk = _preprocess_rows(chunk, unique_rows)
+        seen_hashes.update(hashes.loc[preprocessed_chunk.index].tolist())
+        yield preprocessed_chunk
@@ -0,0 +1,189 @@
+'''Versioned store of fitted models.
+
+Each model is stored under a key derived from what produced it: the
+fingerprint of the training data, the split configuration and the parameters
+of the unfitted pipeline. Training again with identical inputs is skipped.
+
+Models are stored uncompressed ("hot"), so joblib can memory-map their NumPy
+arrays: scoring workers loading the same model share one physical copy
+through the OS cache. Models that are rarely used can be archived compressed
+("cold"), and are decompressed back to hot storage on their next load.
+
+Note that scikit-learn's Cython decision trees (and so random forests and
+extra trees) copy their nodes out of the arrays when unpickled, so only the
+NumPy-backed models (linear models, histogram gradient boosting, k-means
+centroids, ...) fully benefit from memory mapping.
+'''
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+import joblib
+import pandas as pd
+from sklearn.base import BaseEstimator, clone
+
+_MANIFEST_FILENAME = 'manifest.json'
+_HOT_FILENAME = 'model.joblib'
+_COLD_FILENAME = 'model.joblib.xz'
+
+
+def model_key(
+    data_fingerprint: str,
+    split_config: dict[str, Any],
+    pipeline: BaseEstimator,
+) -> str:
+    '''Returns the key of a model in the registry.
+
+    Args:
+        data_fingerprint: A hash of the training data, e.g. the sha256 of
+            the pre-processed dataset file.
+        split_config: The parameters of the train/test split.
+        pipeline: The pipeline to be fitted. Only its parameters count, not
+            its fitted state.
+
+    Returns:
+        The hexadecimal key of the model.
+    '''
+    return joblib.hash((
+        data_fingerprint,
+        sorted(split_config.items()),
+        clone(pipeline),
+    ))
+
+
+class ModelRegistry:
+    '''Store of fitted models, keyed by `model_key`.
+
+    Args:
+        root: The directory of the registry. Each model is stored in a
+            subdirectory named after its key, with a JSON manifest.
+    '''
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def _model_dir(self, key: str) -> Path:
+        return self.root / key
+
+    def __contains__(self, key: str) -> bool:
+        return (self._model_dir(key) / _MANIFEST_FILENAME).exists()
+
+    def save(
+        self,
+        key: str,
+        model: BaseEstimator,
+        manifest: dict[str, Any] | None = None,
+    ) -> None:
+        '''Stores a fitted model, uncompressed.
+
+        Args:
+            key: The key of the model, from `model_key`.
+            model: The fitted model.
+            manifest: Information about the model, e.g. the split config
+                and its scores. It must be JSON-serializable.
+        '''
+        manifest = {
+            **(manifest or {}),
+            'key': key,
+            'model': repr(model),
+            'created_at': datetime.now(timezone.utc).isoformat(),
+        }
+        # Write to a temporary directory and rename it, so that concurrent
+        # readers never see a partial model.
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(dir=self.root))
+        try:
+            joblib.dump(model, tmp_dir / _HOT_FILENAME)
+            with open(tmp_dir / _MANIFEST_FILENAME, 'w', encoding='utf8') as f:
+                json.dump(manifest, f, indent=4)
+            shutil.rmtree(self._model_dir(key), ignore_errors=True)
+            os.replace(tmp_dir, self._model_dir(key))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def load(self, key: str, mmap: bool = True) -> BaseEstimator:
+        '''Loads a model, restoring it to hot storage if it was archived.
+
+        Args:
+            key: The key of the model.
+            mmap: Whether to memory-map the arrays of the model, read-only,
+                instead of reading them into memory.
+
+        Returns:
+            The fitted model.
+        '''
+        model_dir = self._model_dir(key)
+        if key not in self:
+            raise KeyError(f'No model with key {key!r} in {self.root}.')
+        hot_path = model_dir / _HOT_FILENAME
+        if not hot_path.exists():
+            self._restore(model_dir)
+        return joblib.load(hot_path, mmap_mode='r' if mmap else None)
+
+    def archive(self, key: str, compress: int = 3) -> None:
+        '''Moves a model to cold storage, compressed with LZMA.'''
+        model_dir = self._model_dir(key)
+        hot_path = model_dir / _HOT_FILENAME
+        if not hot_path.exists():
+            return
+        model = joblib.load(hot_path)
+        tmp_path = model_dir / f'{_COLD_FILENAME}.tmp'
+        joblib.dump(model, tmp_path, compress=('xz', compress))
+        os.replace(tmp_path, model_dir / _COLD_FILENAME)
+        hot_path.unlink()
+
+    def _restore(self, model_dir: Path) -> None:
+        model = joblib.load(model_dir / _COLD_FILENAME)
+        tmp_path = model_dir / f'{_HOT_FILENAME}.tmp'
+        joblib.dump(model, tmp_path)
+        os.replace(tmp_path, model_dir / _HOT_FILENAME)
+        (model_dir / _COLD_FILENAME).unlink()
+
+    def manifests(self) -> pd.DataFrame:
+        '''Returns the manifests of all models, one row per model.'''
+        records = []
+        for manifest_path in sorted(self.root.glob(f'*/{_MANIFEST_FILENAME}')):
+            with open(manifest_path, 'r', encoding='utf8') as f:
+                manifest = json.load(f)
+            manifest['hot'] = (manifest_path.parent / _HOT_FILENAME).exists()
+            records.append(manifest)
+        return pd.DataFrame(records)
+
+    def get_or_train(
+        self,
+        data_fingerprint: str,
+        split_config: dict[str, Any],
+        pipeline: BaseEstimator,
+        train: Callable[[BaseEstimator], dict[str, Any]],
+        mmap: bool = True,
+    ) -> tuple[BaseEstimator, bool]:
+        '''Loads a model, training and storing it first if needed.
+
+        Args:
+            data_fingerprint: A hash of the training data.
+            split_config: The parameters of the train/test split.
+            pipeline: The unfitted pipeline.
+            train: A function that fits the pipeline it receives, in place,
+                and returns information about it (e.g. its scores) for the
+                manifest.
+            mmap: Whether to memory-map the arrays of the model.
+
+        Returns:
+            The fitted model and whether it was trained.
+        '''
+        key = model_key(data_fingerprint, split_config, pipeline)
+        if key in self:
+            return self.load(key, mmap=mmap), False
+
+        model = clone(pipeline)
+        info = train(model)
+        self.save(key, model, {
+            'data_fingerprint': data_fingerprint,
+            'split_config': split_config,
+            **info,
+        })
+        return self.load(key, mmap=mmap), True
@@ -0,0 +1,261 @@
+'''Successive-halving hyperparameter search on a cached pre-processing.
+
+The pre-processing is fitted once per cross-validation fold, and the
+transformed fold matrices are cached on disk (see `lab01.trainer`). Every
+candidate is then trained on rows of these matrices only, so the
+pre-processing is never refitted for a candidate.
+
+Successive halving evaluates all candidates on a small number of training
+rows, keeps the best 1/factor of them, evaluates these on factor times more
+rows, and so on until the rows of the folds are exhausted or one candidate is
+left. The evaluations of a round run in parallel, and the search stops
+early when its time budget is spent.
+'''
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from scipy.stats import loguniform, randint
+from sklearn.base import RegressorMixin, TransformerMixin, clone
+from sklearn.ensemble import (ExtraTreesRegressor,
+                              HistGradientBoostingRegressor,
+                              RandomForestRegressor)
+from sklearn.metrics import root_mean_squared_error
+from sklearn.model_selection import KFold, ParameterSampler
+
+from lab01.pipelines import make_preprocessing_pipe
+from lab01.trainer import load_transformed, transform_once
+
+
+@dataclass
+class Candidate:
+    '''A regressor and the parameters to evaluate it with.'''
+    name: str
+    estimator: RegressorMixin
+    params: dict[str, Any]
+
+    def make_estimator(self) -> RegressorMixin:
+        '''Returns an unfitted copy of the estimator with the parameters.'''
+        return clone(self.estimator).set_params(**self.params)
+
+
+def default_search_space(
+    random_state: int = 42,
+) -> list[tuple[str, RegressorMixin, dict[str, Any]]]:
+    '''Returns the regressors to tune and their parameter distributions.
+    '''
+    return [
+        (
+            'Random Forest',
+            RandomForestRegressor(random_state=random_state),
+            {
+                'n_estimators': randint(50, 300),
+                'max_features': [0.3, 0.5, 1.0],
+                'min_samples_leaf': randint(1, 10),
+            },
+        ),
+        (
+            'Extra Trees',
+            ExtraTreesRegressor(random_state=random_state),
+            {
+                'n_estimators': randint(50, 300),
+                'max_features': [0.3, 0.5, 1.0],
+                'min_samples_leaf': randint(1, 10),
+            },
+        ),
+        (
+            'Histogram Gradient Boosting',
+            HistGradientBoostingRegressor(random_state=random_state),
+            {
+                'learning_rate': loguniform(0.01, 0.3),
+                'max_leaf_nodes': randint(15, 127),
+                'l2_regularization': loguniform(1e-3, 10),
+            },
+        ),
+    ]
+
+
+def sample_candidates(
+    search_space: list[tuple[str, RegressorMixin, dict[str, Any]]],
+    n_candidates: int,
+    random_state: int = 42,
+) -> list[Candidate]:
+    '''Samples n_candidates parameter sets for each regressor.'''
+    return [
+        Candidate(name, estimator, params)
+        for i, (name, estimator, distributions) in enumerate(search_space)
+        for params in ParameterSampler(
+            distributions,
+            n_iter=n_candidates,
+            random_state=random_state + i,
+        )
+    ]
+
+
+def _evaluate(
+    candidate: Candidate,
+    transformed_dir: Path,
+    n_rows: int,
+    random_state: int,
+) -> tuple[float, float]:
+    arrays = load_transformed(transformed_dir)
+    n_train = len(arrays['y_train'])
+    # The same rows for all candidates, growing with n_rows.
+    rows = np.random.default_rng(random_state).permutation(n_train)[:n_rows]
+    rows.sort()
+
+    estimator = candidate.make_estimator()
+    start_time = perf_counter()
+    estimator.fit(arrays['X_train'][rows], arrays['y_train'][rows])
+    fit_time = perf_counter() - start_time
+
+    y_pred = estimator.predict(arrays['X_test'])
+    return root_mean_squared_error(arrays['y_test'], y_pred), fit_time
+
+
+def _transform_folds(
+    preprocessing: TransformerMixin,
+    X: pd.DataFrame,
+    y: pd.Series,
+    cv: int,
+    cache_dir: Path,
+    random_state: int,
+) -> list[Path]:
+    folds = KFold(n_splits=cv, shuffle=True, random_state=random_state)
+    return [
+        transform_once(
+            preprocessing,
+            X.iloc[train_indices],
+            y.iloc[train_indices],
+            X.iloc[test_indices],
+            y.iloc[test_indices],
+            cache_dir,
+        )[0]
+        for train_indices, test_indices in folds.split(X)
+    ]
+
+
+def successive_halving(
+    X: pd.DataFrame,
+    y: pd.Series,
+    candidates: list[Candidate],
+    cache_dir: Path,
+    preprocessing: TransformerMixin | None = None,
+    cv: int = 5,
+    factor: int = 3,
+    min_rows: int = 500,
+    time_budget: float | None = None,
+    jobs: int | None = None,
+    random_state: int = 42,
+) -> pd.DataFrame:
+    '''Searches the best candidate by successive halving on sample size.
+
+    Args:
+        X: The training features.
+        y: The training target.
+        candidates: The candidates, e.g. from `sample_candidates`.
+        cache_dir: The directory where the transformed folds are kept.
+        preprocessing: The unfitted pre-processing. Defaults to the one of
+            the modeling notebook.
+        cv: The number of cross-validation folds.
+        factor: The fraction of candidates kept, and the growth of the
+            number of rows, at each round.
+        min_rows: The number of training rows of the first round.
+        time_budget: The time, in seconds, after which no more evaluations
+            are started. The running ones are waited for, and the search
+            ends with the candidates of the current round that were
+            evaluated on every fold.
+        jobs: The number of processes. Defaults to the number of CPUs.
+        random_state: The seed of the folds and of the row samples.
+
+    Returns:
+        The leaderboard: one row per candidate, with its parameters, the
+        last round it completed, the number of training rows of that round,
+        its mean and standard deviation of the RMSE across folds, and its
+        mean and total fit times. The best candidates come first.
+    '''
+    start_time = perf_counter()
+    deadline = None if time_budget is None else start_time + time_budget
+    if preprocessing is None:
+        preprocessing = make_preprocessing_pipe()
+    transformed_dirs = _transform_folds(
+        preprocessing, X, y, cv, cache_dir, random_state)
+    max_rows = min(len(load_transformed(path)['y_train'])
+                   for path in transformed_dirs)
+
+    results: dict[int, dict[str, Any]] = {}
+    alive = list(range(len(candidates)))
+    n_rows = min(min_rows, max_rows)
+    round_index = 0
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        while alive:
+            futures = {
+                executor.submit(
+                    _evaluate,
+                    candidates[i],
+                    path,
+                    n_rows,
+                    random_state,
+                ): i
+                for i in alive for path in transformed_dirs
+            }
+            scores = {i: [] for i in alive}
+            fit_times = {i: [] for i in alive}
+            pending = set(futures)
+            while pending:
+                timeout = None if deadline is None \
+                    else max(deadline - perf_counter(), 0)
+                done, pending = wait(
+                    pending,
+                    timeout=timeout,
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in done:
+                    score, fit_time = future.result()
+                    scores[futures[future]].append(score)
+                    fit_times[futures[future]].append(fit_time)
+                if deadline is not None and perf_counter() >= deadline:
+                    break
+            for future in pending:
+                future.cancel()
+
+            # In a round cut short by the time budget, only the candidates
+            # evaluated on every fold are ranked.
+            for i in alive:
+                if len(scores[i]) < len(transformed_dirs):
+                    continue
+                results[i] = {
+                    'round': round_index,
+                    'n_rows': n_rows,
+                    'rmse_mean': float(np.mean(scores[i])),
+                    'rmse_std': float(np.std(scores[i])),
+                    'fit_time_mean': float(np.mean(fit_times[i])),
+                    'fit_time_total': results.get(i, {}).get(
+                        'fit_time_total', 0.0) + float(np.sum(fit_times[i])),
+                }
+            if pending or len(alive) == 1 or n_rows >= max_rows:
+                break
+            alive.sort(key=lambda i: results[i]['rmse_mean'])
+            alive = alive[:max(1, len(alive) // factor)]
+            n_rows = min(n_rows * factor, max_rows)
+            round_index += 1
+
+    leaderboard = pd.DataFrame([
+        {
+            'name': candidates[i].name,
+            'params': candidates[i].params,
+            **result,
+        }
+        for i, result in results.items()
+    ])
+    if leaderboard.empty:
+        return leaderboard
+    return leaderboard.sort_values(
+        ['round', 'rmse_mean'],
+        ascending=[False, True],
+        ignore_index=True,
+    )
@@ -0,0 +1,299 @@
+'''Local HTTP/JSON inference server with micro-batching.
+
+Concurrent requests are queued and coalesced into micro-batches: a batch is
+predicted as soon as it holds max_batch_size rows, or max_wait seconds after
+its first request arrived, whichever comes first. The model is thus called
+on a few large DataFrames instead of many one-row ones.
+
+Endpoints:
+    POST /predict: the body is a JSON object of column values (one row) or a
+        list of them; the response is {"predictions": [...]}. Rows without
+        exactly the input columns of the model are rejected.
+    GET /metrics: latency percentiles, throughput and batch counters.
+    GET /health: {"status": "ok"}.
+'''
+import json
+import queue
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+
+import joblib
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT = 0.005
+LATENCY_WINDOW = 10_000
+
+
+@dataclass
+class _Request:
+    rows: list[dict[str, Any]]
+    received_at: float
+    done: threading.Event = field(default_factory=threading.Event)
+    predictions: list[float] | None = None
+    error: Exception | None = None
+
+
+class ServingMetrics:
+    '''Thread-safe latency and throughput counters.
+
+    Latencies are kept for the last LATENCY_WINDOW requests.
+    '''
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._started_at = perf_counter()
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.errors = 0
+
+    def record_batch(self, requests: list[_Request], finished_at: float):
+        '''Records a predicted batch and the latency of its requests.'''
+        with self._lock:
+            self.batches += 1
+            self.requests += len(requests)
+            self.rows += sum(len(request.rows) for request in requests)
+            self.errors += sum(request.error is not None
+                               for request in requests)
+            self._latencies.extend(finished_at - request.received_at
+                                   for request in requests)
+
+    def snapshot(self) -> dict[str, float]:
+        '''Returns the current values of the counters.'''
+        with self._lock:
+            latencies = np.array(self._latencies)
+            elapsed = perf_counter() - self._started_at
+            requests, rows, batches, errors = \
+                self.requests, self.rows, self.batches, self.errors
+        p50, p99 = (np.percentile(latencies, [50, 99]) * 1000
+                    if len(latencies) else (np.nan, np.nan))
+        return {
+            'requests': requests,
+            'rows': rows,
+            'batches': batches,
+            'errors': errors,
+            'mean_batch_rows': rows / batches if batches else 0.0,
+            'latency_p50_ms': float(p50),
+            'latency_p99_ms': float(p99),
+            'requests_per_second': requests / elapsed,
+            'rows_per_second': rows / elapsed,
+        }
+
+
+class MicroBatcher:
+    '''Coalesces concurrent prediction requests into micro-batches.
+
+    Args:
+        model: A fitted model whose predict method takes a DataFrame.
+        max_batch_size: The maximum number of rows of a batch. A request
+            with more rows is predicted as a batch of its own.
+        max_wait: The maximum time, in seconds, that the first request of a
+            batch waits for other ones.
+    '''
+
+    def __init__(
+        self,
+        model: Any,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait: float = DEFAULT_MAX_WAIT,
+    ) -> None:
+        self.model = model
+        # The input columns the model was fitted on, if it records them.
+        self.columns = getattr(model, 'feature_names_in_', None)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.metrics = ServingMetrics()
+        self._queue: queue.Queue[_Request | None] = queue.Queue()
+        self._pending: _Request | None = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def validate(self, rows: Any) -> None:
+        '''Raises a ValueError if rows are not a valid prediction input.
+
+        The rows must be a non-empty list of JSON objects, with exactly the
+        input columns of the model when it records them.
+        '''
+        if not isinstance(rows, list) or not rows:
+            raise ValueError('Expected a row or a non-empty list of rows.')
+        if not all(isinstance(row, dict) for row in rows):
+            raise ValueError('Each row must be a JSON object.')
+        if self.columns is None:
+            return
+        expected = set(self.columns)
+        for row in rows:
+            if row.keys() != expected:
+                missing = sorted(expected - row.keys())
+                unexpected = sorted(row.keys() - expected)
+                raise ValueError(f'Wrong columns: missing {missing}, '
+                                 f'unexpected {unexpected}.')
+
+    def _predict_rows(self, rows: list[dict[str, Any]]) -> list[float]:
+        return self.model.predict(
+            pd.DataFrame(rows, columns=self.columns)).tolist()
+
+    def predict(self, rows: list[dict[str, Any]]) -> list[float]:
+        '''Predicts rows, blocking until their batch has been predicted.'''
+        request = _Request(rows=rows, received_at=perf_counter())
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.predictions
+
+    def close(self) -> None:
+        '''Stops the batching thread once the queued requests are served.'''
+        self._queue.put(None)
+        self._thread.join()
+
+    def _next_batch(self) -> list[_Request] | None:
+        if self._pending is not None:
+            first, self._pending = self._pending, None
+        elif self._closed:
+            return None
+        else:
+            first = self._queue.get()
+        if first is None:
+            return None
+
+        batch = [first]
+        n_rows = len(first.rows)
+        deadline = first.received_at + self.max_wait
+        while n_rows < self.max_batch_size:
+            # Requests already queued join the batch even after the
+            # deadline, which only bounds the time spent waiting for more.
+            timeout = max(deadline - perf_counter(), 0)
+            try:
+                request = self._queue.get(timeout=timeout) if timeout \
+                    else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                self._closed = True
+                break
+            if n_rows + len(request.rows) > self.max_batch_size:
+                # Starts the next batch.
+                self._pending = request
+                break
+            batch.append(request)
+            n_rows += len(request.rows)
+        return batch
+
+    def _predict_batch(self, batch: list[_Request]) -> None:
+        rows = [row for request in batch for row in request.rows]
+        try:
+            predictions = self._predict_rows(rows)
+        except Exception:  # pylint: disable=broad-except
+            # Predicts the requests one by one, so that a bad request only
+            # fails itself and not the others of its batch.
+            for request in batch:
+                try:
+                    request.predictions = self._predict_rows(request.rows)
+                except Exception as error:  # pylint: disable=broad-except
+                    request.error = error
+        else:
+            start = 0
+            for request in batch:
+                end = start + len(request.rows)
+                request.predictions = predictions[start:end]
+                start = end
+        finished_at = perf_counter()
+        for request in batch:
+            request.done.set()
+        self.metrics.record_batch(batch, finished_at)
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._predict_batch(batch)
+
+
+class _Server(ThreadingHTTPServer):
+    # Concurrent clients would overflow the default backlog of 5.
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def _make_handler(batcher: MicroBatcher) -> type[BaseHTTPRequestHandler]:
+
+    class Handler(BaseHTTPRequestHandler):
+        '''Handles the requests of the inference server.'''
+
+        def _send_json(self, status: int, content: Any) -> None:
+            body = json.dumps(content).encode('utf8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):  # pylint: disable=invalid-name
+            '''Serves the metrics and health endpoints.'''
+            if self.path == '/metrics':
+                self._send_json(200, batcher.metrics.snapshot())
+            elif self.path == '/health':
+                self._send_json(200, {'status': 'ok'})
+            else:
+                self._send_json(404, {'error': 'not found'})
+
+        def do_POST(self):  # pylint: disable=invalid-name
+            '''Serves the predict endpoint.'''
+            if self.path != '/predict':
+                self._send_json(404, {'error': 'not found'})
+                return
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                content = json.loads(self.rfile.read(length))
+                rows = content if isinstance(content, list) else [content]
+                batcher.validate(rows)
+            except ValueError as error:
+                self._send_json(400, {'error': str(error)})
+                return
+            try:
+                predictions = batcher.predict(rows)
+            except Exception as error:  # pylint: disable=broad-except
+                self._send_json(400, {'error': str(error)})
+                return
+            self._send_json(200, {'predictions': predictions})
+
+        def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+            # Logging every request would dominate the latency.
+            pass
+
+    return Handler
+
+
+def make_server(
+    model_path: Path,
+    host: str = '127.0.0.1',
+    port: int = 8000,
+    max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+    max_wait: float = DEFAULT_MAX_WAIT,
+) -> tuple[ThreadingHTTPServer, MicroBatcher]:
+    '''Loads the model once and makes the inference server.
+
+    Args:
+        model_path: The joblib file of the fitted model.
+        host: The address to listen on.
+        port: The port to listen on.
+        max_batch_size: The maximum number of rows of a micro-batch.
+        max_wait: The maximum time, in seconds, a request waits for others.
+
+    Returns:
+        The server, to be run with serve_forever, and its batcher.
+    '''
+    model = joblib.load(model_path)
+    batcher = MicroBatcher(model, max_batch_size, max_wait)
+    server = _Server((host, port), _make_handler(batcher))
+    return server, batcher
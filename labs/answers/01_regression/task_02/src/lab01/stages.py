@@ -0,0 +1,159 @@
+'''Incremental execution of pipelines made of named stages.
+
+Each stage is skipped when its inputs, code and parameters are the same as
+in the previous run, so after an edit only the changed stage and the stages
+downstream of it are run again.
+'''
+import hashlib
+import inspect
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+import pandas as pd
+
+from lab01.cache import compute_fingerprint
+
+
+@dataclass
+class Stage:
+    '''A named step of a pipeline.
+
+    The function is called with the parameters as keyword arguments and,
+    if the previous stage returned a DataFrame, with it as the first
+    positional argument. A stage that returns None, like one that saves its
+    input, is a sink: the next stage starts from its own inputs.
+
+    Attributes:
+        name: The name of the stage, unique within the pipeline.
+        function: The function that runs the stage. Its code is the source
+            file of the module that defines it, so that editing any helper
+            in that module also invalidates the stage.
+        params: The keyword arguments of the function. Their repr is part
+            of the cache key.
+        inputs: The files read by the stage.
+        outputs: The files written by the stage.
+    '''
+    name: str
+    function: Callable[..., pd.DataFrame | None]
+    params: dict[str, Any] = field(default_factory=dict)
+    inputs: list[Path] = field(default_factory=list)
+    outputs: list[Path] = field(default_factory=list)
+
+
+def _hash_code(function: Callable) -> str:
+    source_file = inspect.getsourcefile(function)
+    with open(source_file, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _file_hashes(paths: list[Path]) -> dict[str, str | None]:
+    return {
+        str(path): compute_fingerprint(path).sha256 if path.exists() else None
+        for path in paths
+    }
+
+
+def _stage_key(stage: Stage, upstream_key: str) -> str:
+    description = {
+        'upstream': upstream_key,
+        'name': stage.name,
+        'code': _hash_code(stage.function),
+        'params': sorted((name, repr(value))
+                         for name, value in stage.params.items()),
+        'inputs': _file_hashes(stage.inputs),
+    }
+    content = json.dumps(description, sort_keys=True).encode('utf8')
+    return hashlib.sha256(content).hexdigest()
+
+
+def _record_path(stage: Stage, cache_dir: Path) -> Path:
+    return cache_dir / f'{stage.name}.json'
+
+
+def _output_path(stage: Stage, cache_dir: Path) -> Path:
+    return cache_dir / f'{stage.name}.parquet'
+
+
+def _is_fresh(stage: Stage, key: str, cache_dir: Path) -> bool:
+    record_path = _record_path(stage, cache_dir)
+    if not record_path.exists():
+        return False
+    with open(record_path, 'r', encoding='utf8') as f:
+        record = json.load(f)
+    # A stage whose cached output was deleted must run again, or the next
+    # stage would be called without its input. Records written before
+    # has_output existed are assumed to have an output.
+    if record.get('has_output', True) \
+            and not _output_path(stage, cache_dir).exists():
+        return False
+    return (record['key'] == key
+            and record['outputs'] == _file_hashes(stage.outputs))
+
+
+def _save_record(
+    stage: Stage,
+    key: str,
+    output: pd.DataFrame | None,
+    cache_dir: Path,
+) -> None:
+    output_path = _output_path(stage, cache_dir)
+    if output is None:
+        output_path.unlink(missing_ok=True)
+    else:
+        output.to_parquet(output_path)
+    record = {
+        'key': key,
+        'outputs': _file_hashes(stage.outputs),
+        'has_output': output is not None,
+    }
+    with open(_record_path(stage, cache_dir), 'w', encoding='utf8') as f:
+        json.dump(record, f, indent=4)
+
+
+def _load_output(stage: Stage, cache_dir: Path) -> pd.DataFrame | None:
+    output_path = _output_path(stage, cache_dir)
+    if not output_path.exists():
+        return None
+    return pd.read_parquet(output_path)
+
+
+def run_stages(stages: list[Stage], cache_dir: Path) -> list[str]:
+    '''Runs the stages of a pipeline that are not up to date.
+
+    The key of a stage is a hash of the key of the previous stage, of the
+    stage's code and parameters and of the content of its input files. A
+    stage is up to date when its key is the one of its last run, its output
+    files have not changed since and its cached output, if it returned one,
+    is still there. The output of every stage is kept in cache_dir, and is
+    only loaded when a later stage has to run.
+
+    Args:
+        stages: The stages of the pipeline, in order.
+        cache_dir: The directory where the stage outputs are kept.
+
+    Returns:
+        The names of the stages that were run.
+    '''
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    executed = []
+    key = ''
+    output = None
+    cached_stage = None
+    for stage in stages:
+        key = _stage_key(stage, key)
+        if _is_fresh(stage, key, cache_dir):
+            cached_stage = stage
+            continue
+
+        if cached_stage is not None:
+            output = _load_output(cached_stage, cache_dir)
+            cached_stage = None
+        args = [output] if output is not None else []
+        output = stage.function(*args, **stage.params)
+        _save_record(stage, key, output, cache_dir)
+        executed.append(stage.name)
+
+    return executed
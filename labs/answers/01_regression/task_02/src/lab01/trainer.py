@@ -0,0 +1,190 @@
+'''Trains several regressors on a shared, fit-once pre-processing.
+
+The pre-processing pipeline is fitted once on the training set, and the
+transformed train and test matrices are cached on disk, keyed by a hash of
+the data and of the pipeline's parameters. The candidate regressors are then
+trained concurrently on a process pool, each worker memory-mapping the cached
+matrices instead of receiving its own copy.
+'''
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from time import perf_counter
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import RegressorMixin, TransformerMixin, clone
+from sklearn.metrics import root_mean_squared_error
+
+from lab01.pipelines import make_preprocessing_pipe, make_regressors
+
+_ARRAY_NAMES = ['X_train', 'X_test', 'y_train', 'y_test']
+_PREPROCESSING_FILENAME = 'preprocessing.joblib'
+
+
+def transformed_key(
+    preprocessing: TransformerMixin,
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    X_test: pd.DataFrame,
+    y_test: pd.Series,
+) -> str:
+    '''Returns the cache key of a pre-processing and its data.
+
+    The key is a hash of the data and of the parameters of the unfitted
+    pre-processing, so it changes when either one does.
+    '''
+    return joblib.hash(
+        (clone(preprocessing), X_train, y_train, X_test, y_test))
+
+
+def transform_once(
+    preprocessing: TransformerMixin,
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    X_test: pd.DataFrame,
+    y_test: pd.Series,
+    cache_dir: Path,
+) -> tuple[Path, bool]:
+    '''Fits the pre-processing on the training set and transforms both sets.
+
+    The transformed matrices, the targets and the fitted pre-processing are
+    saved in a subdirectory of cache_dir named after `transformed_key`, and
+    are reused while the data and the parameters do not change.
+
+    Args:
+        preprocessing: The unfitted pre-processing.
+        X_train: The training features.
+        y_train: The training target.
+        X_test: The test features.
+        y_test: The test target.
+        cache_dir: The directory where the transformed data is kept.
+
+    Returns:
+        The directory of the transformed data and whether it was cached.
+    '''
+    key = transformed_key(preprocessing, X_train, y_train, X_test, y_test)
+    transformed_dir = cache_dir / f'transformed.{key[:16]}'
+    if transformed_dir.exists():
+        return transformed_dir, True
+
+    preprocessing = clone(preprocessing)
+    arrays = {
+        'X_train': preprocessing.fit_transform(X_train, y_train),
+        'X_test': preprocessing.transform(X_test),
+        'y_train': y_train.to_numpy(),
+        'y_test': y_test.to_numpy(),
+    }
+
+    # Write to a temporary directory and rename it, so that concurrent runs
+    # never see a partial cache entry.
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(dir=cache_dir))
+    try:
+        for name in _ARRAY_NAMES:
+            array = np.ascontiguousarray(arrays[name])
+            np.save(tmp_dir / f'{name}.npy', array)
+        joblib.dump(preprocessing, tmp_dir / _PREPROCESSING_FILENAME)
+        os.replace(tmp_dir, transformed_dir)
+    except OSError:
+        # Another run cached the same key first.
+        if not transformed_dir.exists():
+            raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return transformed_dir, False
+
+
+def load_transformed(transformed_dir: Path) -> dict[str, np.ndarray]:
+    '''Memory-maps the transformed matrices and targets of a cache entry.
+    '''
+    return {
+        name: np.load(transformed_dir / f'{name}.npy', mmap_mode='r')
+        for name in _ARRAY_NAMES
+    }
+
+
+def load_fitted_preprocessing(transformed_dir: Path) -> TransformerMixin:
+    '''Loads the fitted pre-processing of a cache entry.'''
+    return joblib.load(transformed_dir / _PREPROCESSING_FILENAME)
+
+
+def _fit_and_evaluate(
+    name: str,
+    regressor: RegressorMixin,
+    transformed_dir: Path,
+) -> dict:
+    arrays = load_transformed(transformed_dir)
+
+    start_time = perf_counter()
+    regressor.fit(arrays['X_train'], arrays['y_train'])
+    elapsed_time_training = perf_counter() - start_time
+
+    start_time = perf_counter()
+    y_pred_train = regressor.predict(arrays['X_train'])
+    y_pred_test = regressor.predict(arrays['X_test'])
+    elapsed_time_predict = perf_counter() - start_time
+
+    return {
+        'name': name,
+        'elapsed_time_training': elapsed_time_training,
+        'elapsed_time_predict': elapsed_time_predict,
+        'rmse_train': root_mean_squared_error(arrays['y_train'], y_pred_train),
+        'rmse_test': root_mean_squared_error(arrays['y_test'], y_pred_test),
+    }
+
+
+def train_models(
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    X_test: pd.DataFrame,
+    y_test: pd.Series,
+    cache_dir: Path,
+    preprocessing: TransformerMixin | None = None,
+    regressors: dict[str, RegressorMixin] | None = None,
+    jobs: int | None = None,
+) -> pd.DataFrame:
+    '''Trains and evaluates regressors on a shared pre-processing.
+
+    Args:
+        X_train: The training features.
+        y_train: The training target.
+        X_test: The test features.
+        y_test: The test target.
+        cache_dir: The directory where the transformed data is kept.
+        preprocessing: The unfitted pre-processing. Defaults to the one of
+            the modeling notebook.
+        regressors: The unfitted regressors, by name. Defaults to the ones
+            of the modeling notebook.
+        jobs: The number of processes. Defaults to the number of CPUs.
+
+    Returns:
+        A pandas DataFrame with the training and prediction times (the
+        pre-processing excluded) and the train and test RMSE of each
+        regressor, in the order of the regressors.
+    '''
+    if preprocessing is None:
+        preprocessing = make_preprocessing_pipe()
+    if regressors is None:
+        regressors = make_regressors()
+
+    transformed_dir, _ = transform_once(
+        preprocessing,
+        X_train,
+        y_train,
+        X_test,
+        y_test,
+        cache_dir,
+    )
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = list(executor.map(
+            _fit_and_evaluate,
+            regressors.keys(),
+            regressors.values(),
+            [transformed_dir] * len(regressors),
+        ))
+    return pd.DataFrame(results)
@@ -0,0 +1,216 @@
+'''Compact local store of the MNIST dataset.
+
+fetch_openml returns MNIST as float64 (8 bytes per pixel), and converting it
+to NumPy makes another copy. This module converts it once into a pair of
+uint8 .npy files (1 byte per pixel, about 55 MB) with a checksum manifest,
+and then loads them as memory-mapped arrays, without downloading or copying:
+
+    from mnist_store import load_mnist
+
+    X_train, X_test, y_train, y_test = load_mnist()
+
+The train and test sets are views of the first 60000 and last 10000 rows.
+'''
+import hashlib
+import json
+import os
+from argparse import ArgumentParser
+from pathlib import Path
+
+import numpy as np
+from sklearn.datasets import fetch_openml, get_data_home
+
+N_TRAIN = 60_000
+N_TEST = 10_000
+N_PIXELS = 28 * 28
+CHUNK_SIZE = 1024 * 1024
+
+_X_FILENAME = 'mnist_X.npy'
+_Y_FILENAME = 'mnist_y.npy'
+_MANIFEST_FILENAME = 'manifest.json'
+
+
+def default_store_dir() -> Path:
+    '''Returns the default store directory, inside scikit-learn's data home.
+    '''
+    return Path(get_data_home()) / 'mnist_uint8'
+
+
+def _sha256(path: Path) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def _read_csv(path: Path) -> tuple[np.ndarray, np.ndarray]:
+    # The label is in the first column. Copies such as Kaggle's start with
+    # a header row (label,1x1,1x2,...).
+    with open(path, 'r', encoding='utf8') as f:
+        has_header = not f.readline().split(',', 1)[0].strip().isdigit()
+    data = np.loadtxt(
+        path,
+        delimiter=',',
+        dtype=np.uint8,
+        skiprows=int(has_header),
+    )
+    return data[:, 1:], data[:, 0]
+
+
+def _read_source(
+    source: Path | list[Path] | None,
+) -> tuple[np.ndarray, np.ndarray]:
+    if source is None:
+        mnist = fetch_openml('mnist_784', version=1, as_frame=False)
+        return mnist['data'], mnist['target']
+    if isinstance(source, list):
+        # CSV files, such as mnist_train.csv and mnist_test.csv, in order.
+        X_parts, y_parts = zip(*(_read_csv(path) for path in source))
+        return np.concatenate(X_parts), np.concatenate(y_parts)
+    if source.suffix == '.npz':
+        # The Keras layout (x_train, y_train, x_test, y_test) or X and y.
+        with np.load(source) as arrays:
+            if 'x_train' in arrays:
+                X = np.concatenate([arrays['x_train'], arrays['x_test']])
+                y = np.concatenate([arrays['y_train'], arrays['y_test']])
+            else:
+                X, y = arrays['X'], arrays['y']
+        return X.reshape(len(X), -1), y
+    return _read_csv(source)
+
+
+def build_mnist_store(
+    store_dir: Path | None = None,
+    source: Path | list[Path] | None = None,
+) -> None:
+    '''Converts MNIST into the uint8 store.
+
+    Args:
+        store_dir: The store directory. Defaults to `default_store_dir()`.
+        source: A local copy of MNIST: an .npz file (Keras layout, or X and
+            y arrays), or CSV files with the label in the first column and
+            an optional header row, such as [mnist_train.csv,
+            mnist_test.csv]. Together they must hold the 60000 training
+            images followed by the 10000 test images. With None, MNIST is
+            fetched from OpenML (or from fetch_openml's cache), which needs
+            network access the first time.
+    '''
+    store_dir = store_dir or default_store_dir()
+    X, y = _read_source(source)
+    if X.shape != (N_TRAIN + N_TEST, N_PIXELS):
+        raise ValueError(
+            f'Unexpected shape of the MNIST images: {X.shape}, expected '
+            f'{(N_TRAIN + N_TEST, N_PIXELS)} (the train and test images).'
+        )
+
+    if source is None:
+        source_name = 'openml:mnist_784'
+    elif isinstance(source, list):
+        source_name = [str(path) for path in source]
+    else:
+        source_name = str(source)
+
+    store_dir.mkdir(parents=True, exist_ok=True)
+    arrays = {
+        _X_FILENAME: np.ascontiguousarray(X, dtype=np.uint8),
+        _Y_FILENAME: np.asarray(y).astype(np.uint8),
+    }
+    manifest = {
+        'n_train': N_TRAIN,
+        'n_test': N_TEST,
+        'source': source_name,
+        'files': {},
+    }
+    for filename, array in arrays.items():
+        # Write to a temporary file and rename it, so that a failed
+        # conversion never leaves a partial store.
+        tmp_path = store_dir / f'{filename}.tmp.npy'
+        np.save(tmp_path, array)
+        os.replace(tmp_path, store_dir / filename)
+        manifest['files'][filename] = {
+            'shape': list(array.shape),
+            'dtype': str(array.dtype),
+            'sha256': _sha256(store_dir / filename),
+        }
+    with open(store_dir / _MANIFEST_FILENAME, 'w', encoding='utf8') as f:
+        json.dump(manifest, f, indent=4)
+
+
+def verify_mnist_store(store_dir: Path | None = None) -> None:
+    '''Checks the store files against the checksums of the manifest.
+
+    Raises a ValueError if a file was modified or truncated.
+    '''
+    store_dir = store_dir or default_store_dir()
+    with open(store_dir / _MANIFEST_FILENAME, 'r', encoding='utf8') as f:
+        manifest = json.load(f)
+    for filename, description in manifest['files'].items():
+        if _sha256(store_dir / filename) != description['sha256']:
+            raise ValueError(f'Checksum mismatch for {store_dir / filename}.')
+
+
+def load_mnist(
+    store_dir: Path | None = None,
+    source: Path | list[Path] | None = None,
+    verify: bool = False,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    '''Loads MNIST from the store, building the store first if needed.
+
+    Args:
+        store_dir: The store directory. Defaults to `default_store_dir()`.
+        source: The source used to build the store if it does not exist;
+            see `build_mnist_store`.
+        verify: Whether to check the checksums of the store files, which
+            reads them entirely.
+
+    Returns:
+        X_train, X_test, y_train and y_test, as read-only memory-mapped
+        uint8 arrays. The images are flattened (784 pixels per row).
+    '''
+    store_dir = store_dir or default_store_dir()
+    if not (store_dir / _MANIFEST_FILENAME).exists():
+        build_mnist_store(store_dir, source)
+    if verify:
+        verify_mnist_store(store_dir)
+
+    X = np.load(store_dir / _X_FILENAME, mmap_mode='r')
+    y = np.load(store_dir / _Y_FILENAME, mmap_mode='r')
+    return X[:N_TRAIN], X[N_TRAIN:], y[:N_TRAIN], y[N_TRAIN:]
+
+
+def parse_args() -> dict:
+    ''' Parse command-line arguments. '''
+    parser = ArgumentParser(description='Build the MNIST store.')
+    parser.add_argument(
+        '-o',
+        '--store-dir',
+        type=Path,
+        default=default_store_dir(),
+        help='Directory of the store',
+    )
+    parser.add_argument(
+        '-s',
+        '--source',
+        type=Path,
+        nargs='+',
+        default=None,
+        help='Local copy of MNIST: an .npz file, or the train and test .csv '
+        'files (default: fetch from OpenML)',
+    )
+    return vars(parser.parse_args())
+
+
+# pylint: disable=missing-function-docstring
+def main():
+    options = parse_args()
+    source = options['source']
+    if source is not None and len(source) == 1:
+        source = source[0]
+    build_mnist_store(options['store_dir'], source)
+    verify_mnist_store(options['store_dir'])
+    print(f'MNIST store written to {options["store_dir"]}')
+
+
+if __name__ == '__main__':
+    main()
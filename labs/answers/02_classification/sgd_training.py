@@ -0,0 +1,247 @@
+'''Out-of-core training of SGD classifiers on memory-mapped data.
+
+Instead of fitting an SGDClassifier on the whole dense training set at once,
+`train_sgd` streams shuffled mini-batches from (memory-mapped) arrays through
+`partial_fit`, so only one batch at a time is converted to floating point.
+After each epoch, the model is scored on a held-out slice of the training
+set, and training stops when this score no longer improves.
+
+`train_detectors` trains the one-vs-rest binary detectors (such as the
+"5 or not 5" detector of the lab) in parallel processes. Each process
+memory-maps the MNIST store (see `mnist_store`) itself, so the pages of the
+dataset are shared through the OS cache rather than copied to each process.
+'''
+import copy
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Iterator
+
+import numpy as np
+import pandas as pd
+from sklearn.base import ClassifierMixin, clone
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import accuracy_score, get_scorer
+
+from mnist_store import default_store_dir, load_mnist
+
+
+def iter_batches(
+    indices: np.ndarray,
+    batch_size: int,
+    rng: np.random.Generator,
+) -> Iterator[np.ndarray]:
+    '''Yields shuffled mini-batches of the indices.
+
+    The indices of each batch are sorted, so that reading the batch from a
+    memory-mapped array goes forward through the file.
+    '''
+    shuffled = rng.permutation(indices)
+    for start in range(0, len(shuffled), batch_size):
+        yield np.sort(shuffled[start:start + batch_size])
+
+
+def train_sgd(
+    X: np.ndarray,
+    y: np.ndarray,
+    positive_label: Any = None,
+    estimator: ClassifierMixin | None = None,
+    epochs: int = 10,
+    batch_size: int = 1024,
+    validation_fraction: float = 0.1,
+    n_iter_no_change: int = 3,
+    tol: float = 1e-3,
+    scoring: str = 'accuracy',
+    random_state: int = 42,
+) -> tuple[ClassifierMixin, pd.DataFrame]:
+    '''Trains a classifier with `partial_fit` over shuffled mini-batches.
+
+    Args:
+        X: The features, e.g. a memory-mapped array.
+        y: The labels.
+        positive_label: If given, a binary detector of this label is trained
+            (the labels become y == positive_label).
+        estimator: The unfitted classifier, which must implement
+            `partial_fit`. Defaults to an SGDClassifier.
+        epochs: The maximum number of passes over the training rows.
+        batch_size: The number of rows of each mini-batch.
+        validation_fraction: The fraction of the rows held out for early
+            stopping. With 0, all the epochs are run.
+        n_iter_no_change: The number of epochs without an improvement of
+            the validation score by at least tol before stopping.
+        tol: The minimum improvement of the validation score.
+        scoring: The scikit-learn scorer of the validation rows.
+        random_state: The seed of the held-out rows and of the shuffling.
+
+    Returns:
+        The classifier, as it was at its best validation score, and the
+        training history: one row per epoch, with its validation score and
+        time.
+    '''
+    rng = np.random.default_rng(random_state)
+    model = clone(estimator) if estimator is not None \
+        else SGDClassifier(random_state=random_state)
+
+    def labels(rows: np.ndarray) -> np.ndarray:
+        y_rows = np.asarray(y[rows])
+        return y_rows if positive_label is None else y_rows == positive_label
+
+    all_indices = np.arange(len(y))
+    classes = np.unique(labels(all_indices))
+    n_validation = int(len(y) * validation_fraction)
+    permutation = rng.permutation(len(y))
+    validation_indices = np.sort(permutation[:n_validation])
+    train_indices = permutation[n_validation:]
+    # The held-out rows are the only ones kept in memory during training.
+    X_validation = np.asarray(X[validation_indices])
+    y_validation = labels(validation_indices)
+    scorer = get_scorer(scoring)
+
+    history = []
+    best_model, best_score = None, -np.inf
+    epochs_no_change = 0
+    for epoch in range(epochs):
+        start_time = perf_counter()
+        for batch in iter_batches(train_indices, batch_size, rng):
+            model.partial_fit(
+                np.asarray(X[batch], dtype=np.float64),
+                labels(batch),
+                classes=classes,
+            )
+        fit_time = perf_counter() - start_time
+
+        score = scorer(model, X_validation, y_validation) \
+            if n_validation else np.nan
+        history.append({
+            'epoch': epoch,
+            'validation_score': score,
+            'fit_time': fit_time,
+        })
+        if not n_validation:
+            continue
+        if score > best_score + tol:
+            epochs_no_change = 0
+        else:
+            epochs_no_change += 1
+        if score > best_score:
+            best_model, best_score = copy.deepcopy(model), score
+        if epochs_no_change >= n_iter_no_change:
+            break
+
+    return best_model or model, pd.DataFrame(history)
+
+
+def _train_detector(
+    store_dir: Path,
+    label: int,
+    kwargs: dict[str, Any],
+) -> tuple[ClassifierMixin, pd.DataFrame]:
+    X_train, _, y_train, _ = load_mnist(store_dir)
+    return train_sgd(X_train, y_train, positive_label=label, **kwargs)
+
+
+def train_detectors(
+    store_dir: Path | None = None,
+    labels: list[int] | None = None,
+    jobs: int | None = None,
+    **kwargs: Any,
+) -> dict[int, tuple[ClassifierMixin, pd.DataFrame]]:
+    '''Trains one-vs-rest binary detectors on the MNIST training set.
+
+    Args:
+        store_dir: The directory of the MNIST store. Defaults to
+            `mnist_store.default_store_dir()`.
+        labels: The digits to train a detector for. Defaults to all of them.
+        jobs: The number of processes. Defaults to the number of CPUs.
+        kwargs: The arguments of `train_sgd`.
+
+    Returns:
+        The detector and training history of each digit.
+    '''
+    store_dir = store_dir or default_store_dir()
+    labels = list(range(10)) if labels is None else labels
+    # Build the store before the processes, which would all try to.
+    load_mnist(store_dir)
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            label: executor.submit(_train_detector, store_dir, label, kwargs)
+            for label in labels
+        }
+        return {label: future.result() for label, future in futures.items()}
+
+
+def predict_one_vs_rest(
+    detectors: dict[int, ClassifierMixin],
+    X: np.ndarray,
+    batch_size: int = 10_000,
+) -> np.ndarray:
+    '''Predicts the label whose detector has the highest decision score.'''
+    labels = np.array(list(detectors))
+    predictions = np.empty(len(X), dtype=labels.dtype)
+    for start in range(0, len(X), batch_size):
+        X_batch = np.asarray(X[start:start + batch_size], dtype=np.float64)
+        scores = np.column_stack([
+            detector.decision_function(X_batch)
+            for detector in detectors.values()
+        ])
+        predictions[start:start + batch_size] = labels[scores.argmax(axis=1)]
+    return predictions
+
+
+def parse_args() -> dict:
+    ''' Parse command-line arguments. '''
+    parser = ArgumentParser(
+        description='Train the one-vs-rest SGD detectors out of core.')
+    parser.add_argument(
+        '-d',
+        '--store-dir',
+        type=Path,
+        default=default_store_dir(),
+        help='Directory of the MNIST store',
+    )
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=None,
+        help='Number of processes (default: one per CPU)',
+    )
+    parser.add_argument(
+        '-e',
+        '--epochs',
+        type=int,
+        default=10,
+        help='Maximum number of epochs',
+    )
+    parser.add_argument(
+        '-b',
+        '--batch-size',
+        type=int,
+        default=1024,
+        help='Number of rows per mini-batch',
+    )
+    return vars(parser.parse_args())
+
+
+# pylint: disable=missing-function-docstring
+def main():
+    options = parse_args()
+    results = train_detectors(
+        options['store_dir'],
+        jobs=options['jobs'],
+        epochs=options['epochs'],
+        batch_size=options['batch_size'],
+    )
+    _, X_test, _, y_test = load_mnist(options['store_dir'])
+    for label, (detector, history) in results.items():
+        accuracy = detector.score(X_test, y_test == label)
+        print(f'{label}: {len(history)} epochs, '
+              f'test accuracy {accuracy:.4f}')
+    detectors = {label: detector for label, (detector, _) in results.items()}
+    accuracy = accuracy_score(y_test, predict_one_vs_rest(detectors, X_test))
+    print(f'One-vs-rest test accuracy: {accuracy:.4f}')
+
+
+if __name__ == '__main__':
+    main()
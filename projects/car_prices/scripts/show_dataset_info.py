@@ -4,8 +4,11 @@ from argparse import ArgumentParser
 from contextlib import contextmanager
 
 import pandas as pd
-from car_prices.dataset import load_car_dataset
+from car_prices.dataset import fetch_car_dataset, load_car_dataset
 from dotenv import dotenv_values
+from stats import (compute_stats_parallel, compute_stats_streaming,
+                   compute_stats_streaming_parallel, load_cached_stats,
+                   save_cached_stats)
 from utils import PRINT_OPTIONS, print_stats
 
 
@@ -16,37 +19,75 @@ def parse_args() -> dict[str, str]:
         '-p',
         '--print',
         type=str,
+        nargs='+',
         choices=PRINT_OPTIONS,
-        default='text',
-        help='Output format',
+        default=['text'],
+        help='Output formats',
     )
     parser.add_argument(
         '-o',
         '--output',
         type=str,
+        nargs='+',
         default=None,
-        help='Output file',
+        help='Output files, one per output format',
     )
-    return vars(parser.parse_args())
+    parser.add_argument(
+        '-c',
+        '--chunksize',
+        type=int,
+        default=None,
+        help='Read the dataset in chunks of this many rows',
+    )
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=1,
+        help='Number of processes (0 for one per CPU)',
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Recompute the statistics even if they are cached',
+    )
+    options = vars(parser.parse_args())
+    if options['output'] and len(options['output']) != len(options['print']):
+        parser.error('the number of outputs must match the number of formats')
+    if options['jobs'] < 0:
+        parser.error('the number of jobs must be positive, or 0 for one per '
+                     'CPU')
+    return options
+
+
+def get_data_dir() -> str:
+    ''' Get the data directory. '''
+    config = dotenv_values()
+    return config['DATA_DIR']
 
 
 def load_data() -> pd.DataFrame:
     ''' Load the car dataset. '''
-    config = dotenv_values()
-    data_dir = config['DATA_DIR']
-    data = load_car_dataset(data_dir)
+    data_dir = get_data_dir()
+    data = load_car_dataset(data_dir, compact=True)
     return data
 
 
-def compute_stats(data: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+def compute_stats(
+    data: pd.DataFrame,
+    jobs: int = 1,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
     ''' Compute dataset statistics. '''
+    if jobs != 1:
+        return compute_stats_parallel(data, jobs)
+
     numerical_stats = data \
         .select_dtypes(include='number') \
         .describe() \
         .transpose()
 
     categorical_stats = data \
-        .select_dtypes(include='object') \
+        .select_dtypes(include=['object', 'string', 'category']) \
         .describe() \
         .transpose()
 
@@ -64,18 +105,55 @@ def get_output(output_option: str) -> io.TextIOBase:
         yield None
 
 
+def get_stats(
+    chunksize: int | None,
+    jobs: int,
+    use_cache: bool,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    ''' Get the dataset statistics, from the cache if possible. '''
+    dataset_path = fetch_car_dataset(get_data_dir())
+    method = 'sketch' if chunksize else 'exact'
+    if use_cache:
+        stats = load_cached_stats(dataset_path, method)
+        if stats is not None:
+            return stats
+
+    if chunksize and jobs != 1:
+        stats = compute_stats_streaming_parallel(
+            dataset_path,
+            jobs=jobs,
+            chunksize=chunksize,
+        )
+    elif chunksize:
+        stats = compute_stats_streaming(dataset_path, chunksize=chunksize)
+    else:
+        data = load_data()
+        stats = compute_stats(data, jobs=jobs)
+
+    save_cached_stats(stats, dataset_path, method)
+    return stats
+
+
 def main() -> None:
     ''' Main function. '''
     options = parse_args()
-    print_option = options['print']
-    output_option = options['output']
+    print_options = options['print']
+    output_options = options['output'] or [None] * len(print_options)
 
-    data = load_data()
-
-    numerical_stats, categorical_stats = compute_stats(data)
+    numerical_stats, categorical_stats = get_stats(
+        chunksize=options['chunksize'],
+        jobs=options['jobs'],
+        use_cache=not options['no_cache'],
+    )
 
-    with get_output(output_option) as out_file:
-        print_stats(numerical_stats, categorical_stats, print_option, out_file)
+    for print_option, output_option in zip(print_options, output_options):
+        with get_output(output_option) as out_file:
+            print_stats(
+                numerical_stats,
+                categorical_stats,
+                print_option,
+                out_file,
+            )
 
 
 if __name__ == '__main__':
@@ -0,0 +1,5 @@
+''' This module computes descriptive statistics out of core. '''
+from ._accumulators import StatsAccumulator
+from ._streaming import DEFAULT_CHUNKSIZE, compute_stats_streaming
+from ._parallel import compute_stats_parallel, compute_stats_streaming_parallel
+from ._cache import load_cached_stats, save_cached_stats
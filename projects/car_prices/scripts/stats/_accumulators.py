@@ -0,0 +1,172 @@
+''' Mergeable accumulators of descriptive statistics. '''
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from ._sketch import QuantileSketch
+
+PERCENTILES = [0.25, 0.5, 0.75]
+
+NUMERICAL_STATS = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+CATEGORICAL_STATS = ['count', 'unique', 'top', 'freq']
+
+
+def split_columns(data: pd.DataFrame) -> tuple[list[str], list[str]]:
+    '''Returns the numerical and the categorical columns of a dataset.'''
+    numerical_columns = data.select_dtypes(include='number').columns
+    categorical_columns = data.select_dtypes(
+        include=['object', 'string', 'category']).columns
+    return list(numerical_columns), list(categorical_columns)
+
+
+class NumericalAccumulator:
+    '''Accumulates the statistics of a numerical column.
+
+    Count, mean and variance are updated with the parallel form of Welford's
+    algorithm (Chan et al.), so merging partial accumulators is exact up to
+    floating-point rounding. Quantiles come from a QuantileSketch.
+    '''
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.sketch = QuantileSketch()
+
+    def update(self, values: np.ndarray) -> None:
+        '''Adds an array of values, ignoring missing ones.'''
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        other = NumericalAccumulator()
+        other.count = len(values)
+        other.mean = float(values.mean())
+        other.m2 = float(((values - other.mean)**2).sum())
+        other.min = float(values.min())
+        other.max = float(values.max())
+        other.sketch.update(values)
+        self.merge(other)
+
+    def merge(self, other: 'NumericalAccumulator') -> None:
+        '''Adds the values of another accumulator to this one.'''
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta**2 * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sketch.merge(other.sketch)
+
+    def describe(self) -> list[float]:
+        '''Returns the statistics, in the order of NUMERICAL_STATS.'''
+        if self.count == 0:
+            return [0.0] + [np.nan] * (len(NUMERICAL_STATS) - 1)
+        std = np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+        quantiles = [
+            min(max(quantile, self.min), self.max)
+            for quantile in self.sketch.quantiles(PERCENTILES)
+        ]
+        return [
+            float(self.count),
+            self.mean,
+            std,
+            self.min,
+            *quantiles,
+            self.max,
+        ]
+
+
+class CategoricalAccumulator:
+    '''Accumulates the value counts of a categorical column.'''
+
+    def __init__(self) -> None:
+        self.counts = Counter()
+
+    def update(self, values: pd.Series) -> None:
+        '''Adds a series of values, ignoring missing ones.'''
+        self.counts.update(values.value_counts(sort=False).to_dict())
+
+    def merge(self, other: 'CategoricalAccumulator') -> None:
+        '''Adds the values of another accumulator to this one.'''
+        self.counts.update(other.counts)
+
+    def describe(self) -> list:
+        '''Returns the statistics, in the order of CATEGORICAL_STATS.'''
+        if not self.counts:
+            return [0, 0, np.nan, np.nan]
+        top, freq = self.counts.most_common(1)[0]
+        return [self.counts.total(), len(self.counts), top, freq]
+
+
+class StatsAccumulator:
+    '''Accumulates the statistics of all columns of a dataset.
+
+    Unless given, numerical columns are the ones
+    `select_dtypes(include='number')` picks in the first chunk, and
+    categorical columns the text and category ones, as in
+    `show_dataset_info.compute_stats`.
+    '''
+
+    def __init__(
+        self,
+        numerical_columns: list[str] | None = None,
+        categorical_columns: list[str] | None = None,
+    ) -> None:
+        self.numerical: dict[str, NumericalAccumulator] = {}
+        self.categorical: dict[str, CategoricalAccumulator] = {}
+        if numerical_columns is not None or categorical_columns is not None:
+            self._add_columns(numerical_columns or [], categorical_columns or [])
+
+    def _add_columns(
+        self,
+        numerical_columns: list[str],
+        categorical_columns: list[str],
+    ) -> None:
+        for column in numerical_columns:
+            self.numerical[column] = NumericalAccumulator()
+        for column in categorical_columns:
+            self.categorical[column] = CategoricalAccumulator()
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        '''Adds a chunk of rows of the dataset.'''
+        if not self.numerical and not self.categorical:
+            self._add_columns(*split_columns(chunk))
+        for column, accumulator in self.numerical.items():
+            accumulator.update(pd.to_numeric(chunk[column], errors='coerce'))
+        for column, accumulator in self.categorical.items():
+            accumulator.update(chunk[column])
+
+    def merge(self, other: 'StatsAccumulator') -> None:
+        '''Adds the rows of another accumulator to this one.'''
+        if not self.numerical and not self.categorical:
+            self._add_columns(list(other.numerical), list(other.categorical))
+        for column, accumulator in other.numerical.items():
+            self.numerical[column].merge(accumulator)
+        for column, accumulator in other.categorical.items():
+            self.categorical[column].merge(accumulator)
+
+    def result(self) -> tuple[pd.DataFrame, pd.DataFrame]:
+        '''Returns the numerical and categorical statistics tables.'''
+        numerical_stats = pd.DataFrame(
+            [accumulator.describe() for accumulator in self.numerical.values()],
+            index=list(self.numerical),
+            columns=NUMERICAL_STATS,
+            dtype=float,
+        )
+        categorical_stats = pd.DataFrame(
+            [
+                accumulator.describe()
+                for accumulator in self.categorical.values()
+            ],
+            index=list(self.categorical),
+            columns=CATEGORICAL_STATS,
+            dtype=object,
+        )
+        return numerical_stats, categorical_stats
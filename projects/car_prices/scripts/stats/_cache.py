@@ -0,0 +1,42 @@
+''' Cache of computed statistics, keyed by the dataset fingerprint. '''
+from pathlib import Path
+
+import pandas as pd
+from car_prices.dataset import file_fingerprint
+
+_CACHE_FOLDER = 'cache'
+_STATS_PREFIX = 'stats'
+
+
+def _stats_path(dataset_path: Path, method: str) -> Path:
+    cache_dir = dataset_path.parent / _CACHE_FOLDER
+    fingerprint = file_fingerprint(dataset_path, cache_dir)
+    filename = f'{_STATS_PREFIX}.{fingerprint.sha256[:16]}.{method}.pkl'
+    return cache_dir / filename
+
+
+def load_cached_stats(
+    dataset_path: Path,
+    method: str,
+) -> tuple[pd.DataFrame, pd.DataFrame] | None:
+    '''Loads the statistics computed with method for the current content of
+    the dataset file, or returns None if there are none.
+    '''
+    stats_path = _stats_path(dataset_path, method)
+    if not stats_path.exists():
+        return None
+    return pd.read_pickle(stats_path)
+
+
+def save_cached_stats(
+    stats: tuple[pd.DataFrame, pd.DataFrame],
+    dataset_path: Path,
+    method: str,
+) -> None:
+    '''Saves the statistics computed with method for the current content of
+    the dataset file, replacing the ones of previous contents.
+    '''
+    stats_path = _stats_path(dataset_path, method)
+    for stale_path in stats_path.parent.glob(f'{_STATS_PREFIX}.*.{method}.pkl'):
+        stale_path.unlink(missing_ok=True)
+    pd.to_pickle(stats, stats_path)
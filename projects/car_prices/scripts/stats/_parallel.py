@@ -0,0 +1,170 @@
+''' Parallel computation of descriptive statistics. '''
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from ._accumulators import (CATEGORICAL_STATS, NUMERICAL_STATS,
+                            StatsAccumulator, split_columns)
+from ._streaming import DEFAULT_CHUNKSIZE
+
+
+def _resolve_jobs(jobs: int) -> int:
+    '''Returns the number of processes to use, with jobs=0 for one per CPU.
+    '''
+    if jobs < 0:
+        raise ValueError(
+            f'The number of jobs must be positive, or 0 for one per CPU, '
+            f'got {jobs}.'
+        )
+    return jobs or os.cpu_count()
+
+
+def _describe(
+    data: pd.DataFrame,
+    columns: list[str],
+    stats: list[str],
+) -> pd.DataFrame:
+    if not columns:
+        return pd.DataFrame(columns=stats)
+    return data[columns].describe().transpose()
+
+
+def _describe_columns(
+    data: pd.DataFrame,
+    numerical_columns: list[str],
+    categorical_columns: list[str],
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    numerical_stats = _describe(data, numerical_columns, NUMERICAL_STATS)
+    categorical_stats = _describe(data, categorical_columns, CATEGORICAL_STATS)
+    return numerical_stats, categorical_stats
+
+
+def compute_stats_parallel(
+    data: pd.DataFrame,
+    jobs: int,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    '''Computes the statistics of a dataset, sharding its columns.
+
+    Each process describes a group of columns, so the results are exactly
+    the ones of `show_dataset_info.compute_stats`. With jobs=0, one process
+    per CPU is used.
+    '''
+    numerical_columns, categorical_columns = split_columns(data)
+    columns = numerical_columns + categorical_columns
+    jobs = min(_resolve_jobs(jobs), max(len(columns), 1))
+    shards = [columns[i::jobs] for i in range(jobs)]
+    with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+        futures = [
+            executor.submit(
+                _describe_columns,
+                data[shard],
+                [column for column in shard if column in numerical_columns],
+                [column for column in shard if column in categorical_columns],
+            ) for shard in shards
+        ]
+        results = [future.result() for future in futures]
+    numerical_stats = pd.concat(
+        [result[0] for result in results if not result[0].empty])
+    categorical_stats = pd.concat(
+        [result[1] for result in results if not result[1].empty])
+    return (
+        numerical_stats.loc[numerical_columns],
+        categorical_stats.loc[categorical_columns],
+    )
+
+
+def _byte_ranges(csv_path: Path, jobs: int) -> list[tuple[int, int]]:
+    '''Splits the rows of a CSV file into byte ranges that end at newlines.
+    '''
+    size = csv_path.stat().st_size
+    with open(csv_path, 'rb') as f:
+        f.readline()
+        start = f.tell()
+        boundaries = [start]
+        for i in range(1, jobs):
+            f.seek(max(start + (size - start) * i // jobs, boundaries[-1]))
+            f.readline()
+            boundaries.append(min(f.tell(), size))
+    boundaries.append(size)
+    return [
+        (begin, end) for begin, end in zip(boundaries[:-1], boundaries[1:])
+        if end > begin
+    ]
+
+
+def _block_size(csv_path: Path, chunksize: int) -> int:
+    '''Estimates the size in bytes of chunksize rows of a CSV file.
+    '''
+    with open(csv_path, 'rb') as f:
+        f.readline()
+        lines = [line for line in (f.readline() for _ in range(1000)) if line]
+    row_size = sum(map(len, lines)) / max(len(lines), 1)
+    return max(int(row_size * chunksize), 1)
+
+
+def _accumulate_range(
+    csv_path: Path,
+    begin: int,
+    end: int,
+    header: list[str],
+    columns: tuple[list[str], list[str]],
+    block_size: int,
+) -> StatsAccumulator:
+    accumulator = StatsAccumulator(*columns)
+    with open(csv_path, 'rb') as f:
+        f.seek(begin)
+        remaining = end - begin
+        leftover = b''
+        while remaining > 0:
+            block = f.read(min(block_size, remaining))
+            remaining -= len(block)
+            block = leftover + block
+            if remaining > 0:
+                # Keep the incomplete last line for the next block.
+                cut = block.rfind(b'\n') + 1
+                block, leftover = block[:cut], block[cut:]
+            if block:
+                chunk = pd.read_csv(
+                    io.BytesIO(block), header=None, names=header)
+                accumulator.update(chunk)
+    return accumulator
+
+
+def compute_stats_streaming_parallel(
+    csv_path: str | Path,
+    jobs: int,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    '''Computes the statistics of a CSV file, sharding its rows.
+
+    The file is split into one byte range per process (fields must not
+    contain newlines). With jobs=0, one process per CPU is used. Each process
+    reads its range in chunks, and the partial statistics are merged: counts,
+    means, variances, extrema and categorical counts exactly, and quantiles
+    to the precision of `QuantileSketch`.
+    '''
+    csv_path = Path(csv_path)
+    sample = pd.read_csv(csv_path, nrows=chunksize)
+    columns = split_columns(sample)
+    block_size = _block_size(csv_path, chunksize)
+
+    ranges = _byte_ranges(csv_path, _resolve_jobs(jobs))
+    accumulator = StatsAccumulator(*columns)
+    with ProcessPoolExecutor(max_workers=max(len(ranges), 1)) as executor:
+        futures = [
+            executor.submit(
+                _accumulate_range,
+                csv_path,
+                begin,
+                end,
+                list(sample.columns),
+                columns,
+                block_size,
+            ) for begin, end in ranges
+        ]
+        for future in futures:
+            accumulator.merge(future.result())
+    return accumulator.result()
@@ -0,0 +1,136 @@
+''' Mergeable quantile sketch. '''
+from collections import Counter
+
+import numpy as np
+
+RELATIVE_ACCURACY = 0.001
+MAX_EXACT_VALUES = 10_000
+
+
+class QuantileSketch:
+    '''Mergeable sketch of the distribution of a numerical column.
+
+    While the column has at most MAX_EXACT_VALUES distinct values, their
+    counts are kept and quantiles are exact (linearly interpolated, like
+    pandas). Beyond that, values are bucketed on a logarithmic scale
+    (DDSketch): every quantile is then within RELATIVE_ACCURACY of one of
+    the two values pandas interpolates between. In both modes, merging two
+    sketches gives the same result as sketching all of their values at once.
+    '''
+
+    def __init__(self) -> None:
+        self._gamma = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+        self._log_gamma = np.log(self._gamma)
+        self.exact = True
+        self.values = Counter()
+        self.positive_buckets = Counter()
+        self.negative_buckets = Counter()
+        self.zero_count = 0
+
+    def update(self, values: np.ndarray) -> None:
+        '''Adds an array of non-missing values to the sketch.'''
+        if self.exact:
+            unique, counts = np.unique(values, return_counts=True)
+            self.values.update(dict(zip(unique.tolist(), counts.tolist())))
+            if len(self.values) > MAX_EXACT_VALUES:
+                self._to_buckets()
+        else:
+            self._add_to_buckets(values)
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        '''Adds the values of another sketch to this one.'''
+        if self.exact and other.exact:
+            self.values.update(other.values)
+            if len(self.values) > MAX_EXACT_VALUES:
+                self._to_buckets()
+            return
+        if self.exact:
+            self._to_buckets()
+        if other.exact:
+            other_values = np.array(list(other.values.keys()), dtype=float)
+            other_counts = np.array(list(other.values.values()))
+            self._add_to_buckets(other_values, other_counts)
+        else:
+            self.positive_buckets.update(other.positive_buckets)
+            self.negative_buckets.update(other.negative_buckets)
+            self.zero_count += other.zero_count
+
+    def quantiles(self, qs: list[float]) -> list[float]:
+        '''Returns the quantiles of the sketched values.'''
+        if self.exact:
+            return self._exact_quantiles(qs)
+        return self._bucket_quantiles(qs)
+
+    def _to_buckets(self) -> None:
+        values = np.array(list(self.values.keys()), dtype=float)
+        counts = np.array(list(self.values.values()))
+        self.exact = False
+        self.values = Counter()
+        self._add_to_buckets(values, counts)
+
+    def _bucket_indices(self, values: np.ndarray) -> np.ndarray:
+        return np.ceil(np.log(values) / self._log_gamma).astype(np.int64)
+
+    def _add_to_buckets(
+        self,
+        values: np.ndarray,
+        counts: np.ndarray | None = None,
+    ) -> None:
+        values = np.asarray(values, dtype=float)
+        if counts is None:
+            counts = np.ones(len(values), dtype=np.int64)
+        for mask, buckets in (
+            (values > 0, self.positive_buckets),
+            (values < 0, self.negative_buckets),
+        ):
+            if not mask.any():
+                continue
+            indices = self._bucket_indices(np.abs(values[mask]))
+            unique, inverse = np.unique(indices, return_inverse=True)
+            bucket_counts = np.bincount(inverse, weights=counts[mask])
+            buckets.update(
+                dict(zip(unique.tolist(), bucket_counts.astype(int).tolist())))
+        self.zero_count += int(counts[values == 0].sum())
+
+    def _bucket_value(self, index: int) -> float:
+        return 2 * self._gamma**index / (self._gamma + 1)
+
+    def _sorted_bucket_values(self) -> tuple[np.ndarray, np.ndarray]:
+        negative = sorted(self.negative_buckets.items(), reverse=True)
+        positive = sorted(self.positive_buckets.items())
+        values = [-self._bucket_value(index) for index, _ in negative]
+        counts = [count for _, count in negative]
+        values.append(0.0)
+        counts.append(self.zero_count)
+        values.extend(self._bucket_value(index) for index, _ in positive)
+        counts.extend(count for _, count in positive)
+        return np.array(values), np.array(counts)
+
+    def _bucket_quantiles(self, qs: list[float]) -> list[float]:
+        values, counts = self._sorted_bucket_values()
+        cumulative = np.cumsum(counts)
+        total = cumulative[-1]
+        if total == 0:
+            return [np.nan for _ in qs]
+        ranks = [q * (total - 1) for q in qs]
+        positions = np.searchsorted(cumulative, ranks, side='right')
+        return [float(values[position]) for position in positions]
+
+    def _exact_quantiles(self, qs: list[float]) -> list[float]:
+        if not self.values:
+            return [np.nan for _ in qs]
+        items = sorted(self.values.items())
+        values = np.array([value for value, _ in items], dtype=float)
+        cumulative = np.cumsum([count for _, count in items])
+        total = cumulative[-1]
+        results = []
+        for q in qs:
+            rank = q * (total - 1)
+            lower = int(np.floor(rank))
+            upper = int(np.ceil(rank))
+            lower_value = values[np.searchsorted(cumulative, lower, 'right')]
+            upper_value = values[np.searchsorted(cumulative, upper, 'right')]
+            fraction = rank - lower
+            results.append(
+                float(lower_value + (upper_value - lower_value) * fraction))
+        return results
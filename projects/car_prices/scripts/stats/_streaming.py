@@ -0,0 +1,24 @@
+''' Out-of-core computation of descriptive statistics. '''
+from pathlib import Path
+
+import pandas as pd
+
+from ._accumulators import StatsAccumulator
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+def compute_stats_streaming(
+    csv_path: str | Path,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    '''Computes the statistics of a CSV file, reading it in chunks.
+
+    Only one chunk is in memory at a time, so the file may be larger than
+    the available memory. The tables have the same shape as the ones of
+    `show_dataset_info.compute_stats`.
+    '''
+    accumulator = StatsAccumulator()
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        accumulator.update(chunk)
+    return accumulator.result()
@@ -1,6 +1,14 @@
 ''' This module contains functions to load the car dataset. '''
-from ._metadata import ExperimentConfig, load_metadata, save_metadata
-from ._raw_dataset_loader import load_car_dataset
+from ._cache import clear_cache, file_fingerprint, set_cache_size
+from ._folds import FOLD_STRATEGIES, compute_folds, fold_count, fold_indices
+from ._metadata import (ExperimentConfig, FoldConfig, load_metadata,
+                        save_metadata)
+from ._raw_dataset_loader import fetch_car_dataset, load_car_dataset
+from ._schema import apply_schema, memory_usage_report
+from ._storage import DATASET_FORMATS
 from ._train_test_datasets import load_datasets, save_datasets
-from ._train_test_split import split_train_test
-from ._dataset import split_train_test_and_save, load_car_dataset_split
+from ._train_test_split import (SPLIT_STRATEGIES, split_train_test,
+                                split_train_test_by_hash,
+                                split_train_test_chunks_by_hash)
+from ._dataset import (split_train_test_and_save, load_car_dataset_split,
+                       compute_folds_and_save, load_car_dataset_fold)
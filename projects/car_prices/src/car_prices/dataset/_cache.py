@@ -0,0 +1,208 @@
+'''Module for caching parsed datasets on disk and in memory.
+
+The regression lab (labs/answers/01_regression/task_02) keeps a copy of this
+module, with the same public API, as `lab01.cache`, since it is packaged
+independently: a fix to either copy should be applied to the other.
+'''
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+
+from ._storage import load_table, save_table_atomically
+
+_CHUNK_SIZE = 1024 * 1024
+_DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+_FINGERPRINT_SUFFIX = '.fingerprint.json'
+_SNAPSHOT_SUFFIX = '.parquet'
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    '''Dataclass identifying the content of a source file.
+    '''
+    size: int
+    mtime_ns: int
+    sha256: str
+
+
+class DataFrameCache:
+    '''Least-recently-used cache of dataframes with a budget in bytes.
+
+    The size of each dataframe is its deep memory usage. When the budget is
+    exceeded, the least recently used dataframes are evicted. A dataframe
+    larger than the whole budget is not cached.
+    '''
+
+    def __init__(self, max_bytes: int = _DEFAULT_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: OrderedDict[str, tuple[pd.DataFrame, int]] = \
+            OrderedDict()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> pd.DataFrame | None:
+        '''Returns a copy of the cached dataframe, or None if not cached.
+        '''
+        if key not in self._entries:
+            return None
+        self._entries.move_to_end(key)
+        dataset, _ = self._entries[key]
+        return dataset.copy()
+
+    def put(self, key: str, dataset: pd.DataFrame) -> None:
+        '''Caches a copy of the dataframe, evicting older ones if needed.
+        '''
+        self.pop(key)
+        size = int(dataset.memory_usage(deep=True).sum())
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (dataset.copy(), size)
+        self.current_bytes += size
+        self._evict()
+
+    def pop(self, key: str) -> None:
+        '''Removes a dataframe from the cache, if present.
+        '''
+        if key in self._entries:
+            _, size = self._entries.pop(key)
+            self.current_bytes -= size
+
+    def resize(self, max_bytes: int) -> None:
+        '''Changes the budget, evicting dataframes if needed.
+        '''
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def clear(self) -> None:
+        '''Removes all dataframes from the cache.
+        '''
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def _evict(self) -> None:
+        while self.current_bytes > self.max_bytes:
+            _, (_, size) = self._entries.popitem(last=False)
+            self.current_bytes -= size
+
+
+_memory_cache = DataFrameCache()
+
+
+def set_cache_size(max_bytes: int) -> None:
+    '''Sets the budget, in bytes, of the in-memory dataset cache.
+    '''
+    _memory_cache.resize(max_bytes)
+
+
+def clear_cache() -> None:
+    '''Empties the in-memory dataset cache.
+    '''
+    _memory_cache.clear()
+
+
+def _hash_file(filepath: Path) -> str:
+    sha256 = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def _load_fingerprint(filepath: Path) -> Fingerprint | None:
+    if not filepath.exists():
+        return None
+    with open(filepath, 'r', encoding='utf8') as fingerprint_file:
+        return Fingerprint(**json.load(fingerprint_file))
+
+
+def _save_fingerprint(fingerprint: Fingerprint, filepath: Path) -> None:
+    with open(filepath, 'w', encoding='utf8') as fingerprint_file:
+        json.dump(asdict(fingerprint), fingerprint_file, indent=4)
+
+
+def compute_fingerprint(
+    filepath: Path,
+    previous: Fingerprint | None = None,
+) -> Fingerprint:
+    '''Computes the fingerprint of a file.
+
+    If the size and modification time match a previous fingerprint, its
+    hash is reused and the file is not read.
+    '''
+    stat = filepath.stat()
+    if (previous is not None and previous.size == stat.st_size
+            and previous.mtime_ns == stat.st_mtime_ns):
+        return previous
+    return Fingerprint(
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        sha256=_hash_file(filepath),
+    )
+
+
+def file_fingerprint(filepath: Path, cache_dir: Path) -> Fingerprint:
+    '''Returns the fingerprint of a file, remembering it in cache_dir.
+
+    The file is only hashed again when its size or modification time
+    changed since the fingerprint was remembered.
+    '''
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    fingerprint_path = cache_dir / (filepath.name + _FINGERPRINT_SUFFIX)
+    previous = _load_fingerprint(fingerprint_path)
+    fingerprint = compute_fingerprint(filepath, previous)
+    if fingerprint != previous:
+        _save_fingerprint(fingerprint, fingerprint_path)
+    return fingerprint
+
+
+def _remove_stale_snapshots(
+    cache_dir: Path,
+    source_name: str,
+    snapshot_path: Path,
+) -> None:
+    for stale_path in cache_dir.glob(f'{source_name}.*{_SNAPSHOT_SUFFIX}'):
+        if stale_path != snapshot_path:
+            stale_path.unlink(missing_ok=True)
+
+
+def cached_read(
+    filepath: Path,
+    reader: Callable[[Path], pd.DataFrame],
+    cache_dir: Path,
+) -> pd.DataFrame:
+    '''Reads filepath with reader, reusing a previous result when possible.
+
+    Results are keyed by the fingerprint (size, modification time and
+    SHA-256) of filepath. They are kept in memory, in a process-wide LRU
+    cache, and on disk, as a Parquet snapshot in cache_dir. When the file
+    changes, its fingerprint changes, so the cached results are ignored and
+    the old snapshot is replaced.
+    '''
+    fingerprint = file_fingerprint(filepath, cache_dir)
+
+    key = f'{filepath.resolve()}:{fingerprint.sha256}'
+    dataset = _memory_cache.get(key)
+    if dataset is not None:
+        return dataset
+
+    snapshot_name = f'{filepath.name}.{fingerprint.sha256[:16]}'
+    snapshot_path = cache_dir / (snapshot_name + _SNAPSHOT_SUFFIX)
+    if snapshot_path.exists():
+        dataset = load_table(snapshot_path, 'parquet')
+    else:
+        dataset = reader(filepath)
+        save_table_atomically(dataset, snapshot_path, 'parquet')
+        _remove_stale_snapshots(cache_dir, filepath.name, snapshot_path)
+
+    _memory_cache.put(key, dataset)
+    return dataset
@@ -2,12 +2,21 @@
 '''
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
 from ._base import PROJECT_NAME, SPLIT_FOLDER
-from ._metadata import ExperimentConfig, load_metadata, save_metadata
+from ._folds import compute_folds, fold_indices, load_folds, save_folds
+from ._metadata import (ExperimentConfig, FoldConfig, load_metadata,
+                        save_metadata)
+from ._raw_dataset_loader import load_car_dataset
+from ._split_indices import (dataset_fingerprint, load_split_indices,
+                             save_split_indices, take_split)
+from ._storage import FiltersType, apply_filters
 from ._train_test_datasets import load_datasets, save_datasets
-from ._train_test_split import split_train_test
+from ._train_test_split import (SPLIT_STRATEGIES, hash_test_mask,
+                                split_train_test, split_train_test_by_hash,
+                                split_train_test_indices)
 
 
 def _get_basepath(data_dir: str | Path) -> Path:
@@ -15,30 +24,161 @@ def _get_basepath(data_dir: str | Path) -> Path:
     return data_path / PROJECT_NAME / SPLIT_FOLDER
 
 
+def _split_positions(
+    dataset: pd.DataFrame,
+    metadata: ExperimentConfig,
+) -> tuple[np.ndarray, np.ndarray]:
+    if metadata.split_strategy == 'hash':
+        test_mask = hash_test_mask(
+            dataset,
+            test_size=metadata.test_size,
+            random_state=metadata.random_state,
+            key_column=metadata.key_column,
+        )
+        train_indices = np.flatnonzero(~test_mask).astype(np.int32)
+        test_indices = np.flatnonzero(test_mask).astype(np.int32)
+        return train_indices, test_indices
+    return split_train_test_indices(
+        n_rows=len(dataset),
+        test_size=metadata.test_size,
+        random_state=metadata.random_state,
+    )
+
+
+def _split(
+    dataset: pd.DataFrame,
+    metadata: ExperimentConfig,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    if metadata.split_strategy == 'hash':
+        return split_train_test_by_hash(
+            dataset=dataset,
+            test_size=metadata.test_size,
+            random_state=metadata.random_state,
+            key_column=metadata.key_column,
+        )
+    return split_train_test(
+        dataset=dataset,
+        test_size=metadata.test_size,
+        random_state=metadata.random_state,
+    )
+
+
 def split_train_test_and_save(
     dataset: pd.DataFrame,
     metadata: ExperimentConfig,
     data_dir: str | Path,
 ) -> None:
     '''Splits the dataset into train and test sets and saves them to the data_dir.
+
+    With metadata.index_only, only the row positions of each set are saved,
+    together with a fingerprint of the dataset, which must then be the car
+    dataset found in the data_dir. The rows are assigned with the
+    metadata.split_strategy.
     '''
-    train_dataset, test_dataset = split_train_test(
-        dataset=dataset,
-        test_size=metadata.test_size,
-        random_state=metadata.random_state,
-    )
+    if metadata.split_strategy not in SPLIT_STRATEGIES:
+        raise ValueError(
+            f'Unknown split strategy {metadata.split_strategy!r}, '
+            f'expected one of {SPLIT_STRATEGIES}.'
+        )
     basepath = _get_basepath(data_dir)
     basepath.mkdir(parents=True, exist_ok=True)
-    save_datasets(train_dataset, test_dataset, basepath)
+
+    if metadata.index_only:
+        train_indices, test_indices = _split_positions(dataset, metadata)
+        save_split_indices(
+            train_indices,
+            test_indices,
+            dataset_fingerprint(dataset),
+            basepath,
+        )
+        save_metadata(metadata, basepath)
+        return
+
+    train_dataset, test_dataset = _split(dataset, metadata)
+    save_datasets(
+        train_dataset,
+        test_dataset,
+        basepath,
+        dataset_format=metadata.dataset_format,
+    )
     save_metadata(metadata, basepath)
 
 
 def load_car_dataset_split(
     data_dir: str | Path,
+    columns: list[str] | None = None,
+    filters: FiltersType | None = None,
 ) -> tuple[pd.DataFrame, pd.DataFrame, ExperimentConfig]:
     '''Loads the train and test datasets and metadata from the data_dir.
+
+    The storage format is read from the metadata, so splits saved as CSV
+    before the format option existed are still loaded. Splits saved as row
+    positions are rebuilt from the (cached) car dataset.
     '''
     basepath = _get_basepath(data_dir)
-    train_dataset, test_dataset = load_datasets(basepath)
     metadata = load_metadata(basepath)
+
+    if metadata.index_only:
+        train_dataset, test_dataset = take_split(
+            load_car_dataset(data_dir),
+            *load_split_indices(basepath),
+        )
+        # Filters may use columns that are not loaded, so they are applied
+        # before the projection, as the readers of load_datasets do.
+        train_dataset = apply_filters(train_dataset, filters)
+        test_dataset = apply_filters(test_dataset, filters)
+        if columns is not None:
+            train_dataset = train_dataset[columns]
+            test_dataset = test_dataset[columns]
+        return train_dataset, test_dataset, metadata
+
+    train_dataset, test_dataset = load_datasets(
+        basepath,
+        dataset_format=metadata.dataset_format,
+        columns=columns,
+        filters=filters,
+    )
     return train_dataset, test_dataset, metadata
+
+
+def compute_folds_and_save(
+    dataset: pd.DataFrame,
+    config: FoldConfig,
+    data_dir: str | Path,
+) -> None:
+    '''Computes cross-validation folds and saves them to the data_dir.
+
+    The folds are saved next to the train/test split, together with a
+    fingerprint of the dataset, which must then be the car dataset found in
+    the data_dir.
+    '''
+    basepath = _get_basepath(data_dir)
+    basepath.mkdir(parents=True, exist_ok=True)
+    folds = compute_folds(dataset, config)
+    save_folds(folds, config, dataset_fingerprint(dataset), basepath)
+
+
+def load_car_dataset_fold(
+    data_dir: str | Path,
+    fold: int,
+    repeat: int = 0,
+    columns: list[str] | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame, FoldConfig]:
+    '''Loads the train and test datasets of a fold from the data_dir.
+
+    The datasets are rebuilt from the (cached) car dataset and the
+    memory-mapped fold file, so many workers can load their folds without
+    each computing or storing them.
+    '''
+    basepath = _get_basepath(data_dir)
+    folds, config, fingerprint = load_folds(basepath)
+    dataset = load_car_dataset(data_dir)
+    train_dataset, test_dataset = take_split(
+        dataset,
+        *fold_indices(folds, fold, repeat),
+        fingerprint,
+    )
+    if columns is not None:
+        train_dataset = train_dataset[columns]
+        test_dataset = test_dataset[columns]
+    return train_dataset, test_dataset, config
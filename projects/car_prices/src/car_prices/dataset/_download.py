@@ -0,0 +1,164 @@
+'''Module for downloading files in chunks, with resume and verification.
+'''
+import hashlib
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_CONNECT_TIMEOUT = 10
+_READ_TIMEOUT = 60
+_CHUNK_SIZE = 1024 * 1024
+_POOL_SIZE = 10
+_RETRIES = 3
+
+_PARTIAL_SUFFIX = '.part'
+
+
+@lru_cache(maxsize=1)
+def get_session() -> requests.Session:
+    '''Returns a session shared by all downloads of this process.
+
+    The session keeps a pool of open connections and retries failed
+    connections with backoff.
+    '''
+    retries = Retry(
+        total=_RETRIES,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+    )
+    adapter = HTTPAdapter(
+        pool_connections=_POOL_SIZE,
+        pool_maxsize=_POOL_SIZE,
+        max_retries=retries,
+    )
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _partial_path(filepath: Path) -> Path:
+    return filepath.with_name(filepath.name + _PARTIAL_SUFFIX)
+
+
+def _hash_file(filepath: Path) -> 'hashlib._Hash':
+    sha256 = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256
+
+
+def _expected_total_size(
+    response: requests.Response,
+    offset: int,
+) -> int | None:
+    content_range = response.headers.get('Content-Range')
+    if content_range and '/' in content_range:
+        total = content_range.rsplit('/', 1)[1]
+        if total.isdigit():
+            return int(total)
+    content_length = response.headers.get('Content-Length')
+    if content_length and content_length.isdigit():
+        return offset + int(content_length)
+    return None
+
+
+def _unsatisfied_range_total(response: requests.Response) -> int | None:
+    # A 416 response gives the size of the content as 'bytes */<size>'.
+    content_range = response.headers.get('Content-Range', '')
+    total = content_range.rsplit('/', 1)[-1]
+    if content_range.startswith('bytes */') and total.isdigit():
+        return int(total)
+    return None
+
+
+def _verify(
+    partial_path: Path,
+    size: int | None,
+    sha256: str,
+    expected_size: int | None,
+    expected_sha256: str | None,
+) -> None:
+    actual_size = partial_path.stat().st_size
+    for reference in (size, expected_size):
+        if reference is not None and actual_size != reference:
+            partial_path.unlink()
+            raise ValueError(
+                f'Size mismatch for {partial_path}: '
+                f'expected {reference} bytes, got {actual_size}.'
+            )
+    if expected_sha256 is not None and sha256 != expected_sha256.lower():
+        partial_path.unlink()
+        raise ValueError(
+            f'SHA-256 mismatch for {partial_path}: '
+            f'expected {expected_sha256}, got {sha256}.'
+        )
+
+
+def download_file(
+    url: str,
+    filepath: Path,
+    expected_size: int | None = None,
+    expected_sha256: str | None = None,
+    session: requests.Session | None = None,
+) -> str:
+    '''Downloads url to filepath and returns the SHA-256 of its content.
+
+    The content is streamed in chunks to a partial file next to filepath. If
+    a partial file is left by an interrupted download, only the missing bytes
+    are requested with an HTTP Range header, and a partial file longer than
+    the content is discarded. Once complete, the size and the SHA-256 are
+    checked, and the partial file is atomically renamed to filepath, so
+    readers never see a half-written file.
+    '''
+    session = session or get_session()
+    partial_path = _partial_path(filepath)
+    offset = partial_path.stat().st_size if partial_path.exists() else 0
+
+    # Ask for the raw bytes, so that sizes and hashes match the file.
+    headers = {'Accept-Encoding': 'identity'}
+    if offset:
+        headers['Range'] = f'bytes={offset}-'
+    with session.get(
+            url,
+            headers=headers,
+            stream=True,
+            timeout=(_CONNECT_TIMEOUT, _READ_TIMEOUT),
+    ) as response:
+        if response.status_code == 416 and offset:
+            if _unsatisfied_range_total(response) != offset:
+                # The partial file is not a prefix of the content (e.g. it is
+                # longer, or the content changed): start over without Range.
+                partial_path.unlink()
+                return download_file(
+                    url,
+                    filepath,
+                    expected_size,
+                    expected_sha256,
+                    session,
+                )
+            # The partial file already holds the whole content.
+            size = offset
+            sha256 = _hash_file(partial_path)
+        else:
+            response.raise_for_status()
+            if response.status_code != 206:
+                # The server ignored the range: start over.
+                offset = 0
+            size = _expected_total_size(response, offset)
+            sha256 = _hash_file(partial_path) if offset else hashlib.sha256()
+            mode = 'ab' if offset else 'wb'
+            with open(partial_path, mode) as f:
+                for chunk in response.iter_content(chunk_size=_CHUNK_SIZE):
+                    f.write(chunk)
+                    sha256.update(chunk)
+
+    digest = sha256.hexdigest()
+    _verify(partial_path, size, digest, expected_size, expected_sha256)
+    os.replace(partial_path, filepath)
+    return digest
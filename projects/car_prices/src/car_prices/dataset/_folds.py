@@ -0,0 +1,152 @@
+'''Module for computing and storing cross-validation folds.
+
+The folds of all repeats are stored as a single int8 array with one row per
+repeat and one column per row of the dataset, holding the test fold of each
+row. Workers memory-map this array instead of recomputing the folds.
+'''
+import json
+from dataclasses import asdict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ._metadata import FoldConfig
+
+FOLD_STRATEGIES = ['kfold', 'stratified', 'holdout']
+
+_FOLDS_FILENAME = 'folds.npy'
+_FOLDS_SOURCE_FILENAME = 'folds.json'
+
+
+def fold_count(config: FoldConfig) -> int:
+    '''Returns the number of folds of each repeat.
+
+    With the holdout strategy, there is a single fold, 0, holding the test
+    rows; the train rows are marked with 1.
+    '''
+    return 1 if config.strategy == 'holdout' else config.n_splits
+
+
+def _kfold(
+    n_rows: int,
+    config: FoldConfig,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    folds = np.empty(n_rows, dtype=np.int8)
+    folds[rng.permutation(n_rows)] = np.arange(n_rows) % config.n_splits
+    return folds
+
+
+def _stratified(
+    bins: np.ndarray,
+    config: FoldConfig,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    # Shuffle the rows within each bin and deal them to the folds in turn,
+    # starting each bin at a random fold so the fold sizes stay balanced.
+    order = np.lexsort((rng.random(len(bins)), bins))
+    sorted_bins = bins[order]
+    bin_starts = np.searchsorted(sorted_bins, sorted_bins, side='left')
+    offsets = rng.integers(config.n_splits, size=config.n_bins)
+    positions = np.arange(len(bins)) - bin_starts + offsets[sorted_bins]
+    folds = np.empty(len(bins), dtype=np.int8)
+    folds[order] = positions % config.n_splits
+    return folds
+
+
+def _holdout(
+    n_rows: int,
+    config: FoldConfig,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    n_test = int(np.ceil(config.test_size * n_rows))
+    folds = np.ones(n_rows, dtype=np.int8)
+    folds[rng.permutation(n_rows)[:n_test]] = 0
+    return folds
+
+
+def compute_folds(dataset: pd.DataFrame, config: FoldConfig) -> np.ndarray:
+    '''Computes the test fold of every row of the dataset, for every repeat.
+
+    All repeats are computed together from a single read of the dataset
+    (only its length, or its stratify_column with the stratified strategy).
+
+    Returns:
+        An int8 array of shape (n_repeats, len(dataset)).
+    '''
+    if config.strategy not in FOLD_STRATEGIES:
+        raise ValueError(
+            f'Unknown fold strategy {config.strategy!r}, '
+            f'expected one of {FOLD_STRATEGIES}.'
+        )
+    if not 2 <= config.n_splits <= np.iinfo(np.int8).max:
+        raise ValueError(f'Invalid number of splits {config.n_splits}.')
+
+    n_rows = len(dataset)
+    if config.strategy == 'stratified':
+        values = dataset[config.stratify_column]
+        if values.isna().any():
+            raise ValueError(
+                f'The stratify column {config.stratify_column!r} has '
+                f'{values.isna().sum()} missing values.'
+            )
+        # There cannot be more (non-empty) quantile bins than rows.
+        n_bins = min(config.n_bins, max(n_rows, 1))
+        ranks = values.rank(method='first')
+        bins = pd.qcut(ranks, n_bins, labels=False).to_numpy(dtype=np.int64)
+
+    rng = np.random.default_rng(config.random_state)
+    folds = np.empty((config.n_repeats, n_rows), dtype=np.int8)
+    for repeat in range(config.n_repeats):
+        if config.strategy == 'kfold':
+            folds[repeat] = _kfold(n_rows, config, rng)
+        elif config.strategy == 'stratified':
+            folds[repeat] = _stratified(bins, config, rng)
+        else:
+            folds[repeat] = _holdout(n_rows, config, rng)
+    return folds
+
+
+def fold_indices(
+    folds: np.ndarray,
+    fold: int,
+    repeat: int = 0,
+) -> tuple[np.ndarray, np.ndarray]:
+    '''Returns the train and test row positions of a fold, as int32 arrays.
+    '''
+    is_test = np.asarray(folds[repeat]) == fold
+    train_indices = np.flatnonzero(~is_test).astype(np.int32)
+    test_indices = np.flatnonzero(is_test).astype(np.int32)
+    return train_indices, test_indices
+
+
+def save_folds(
+    folds: np.ndarray,
+    config: FoldConfig,
+    fingerprint: str,
+    basepath: Path,
+) -> None:
+    '''Saves the folds, their configuration and the source fingerprint.
+    '''
+    np.save(basepath / _FOLDS_FILENAME, folds)
+    source = {
+        'config': asdict(config),
+        'fingerprint': fingerprint,
+        'n_rows': folds.shape[1],
+    }
+    with open(basepath / _FOLDS_SOURCE_FILENAME, 'w',
+              encoding='utf8') as source_file:
+        json.dump(source, source_file, indent=4)
+
+
+def load_folds(basepath: Path) -> tuple[np.ndarray, FoldConfig, str]:
+    '''Loads the folds, their configuration and the source fingerprint.
+
+    The folds are memory-mapped, not read into memory.
+    '''
+    folds = np.load(basepath / _FOLDS_FILENAME, mmap_mode='r')
+    with open(basepath / _FOLDS_SOURCE_FILENAME, 'r',
+              encoding='utf8') as source_file:
+        source = json.load(source_file)
+    return folds, FoldConfig(**source['config']), source['fingerprint']
@@ -10,9 +10,35 @@ _METADATA_FILENAME = 'metadata.csv'
 @dataclass
 class ExperimentConfig:
     '''Dataclass for storing the experiment configuration.
+
+    split_strategy is either 'random', a shuffled split, or 'hash', where
+    each row goes to train or test depending on the hash of its key_column
+    (or of the whole row if key_column is None), so that appending rows to
+    the dataset does not move the existing ones.
     '''
     test_size: float
     random_state: int
+    dataset_format: str = 'csv'
+    index_only: bool = False
+    split_strategy: str = 'random'
+    key_column: str | None = None
+
+
+@dataclass
+class FoldConfig:
+    '''Dataclass for storing the configuration of cross-validation folds.
+
+    strategy is 'kfold', 'stratified' (k-fold with the same distribution of
+    stratify_column, cut in n_bins quantile bins, in every fold) or
+    'holdout' (n_repeats random train/test splits with test_size).
+    '''
+    strategy: str = 'kfold'
+    n_splits: int = 5
+    n_repeats: int = 1
+    random_state: int = 42
+    test_size: float = 0.2
+    stratify_column: str = 'Price'
+    n_bins: int = 10
 
 
 def save_metadata(
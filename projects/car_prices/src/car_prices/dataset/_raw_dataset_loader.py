@@ -1,64 +1,226 @@
 '''Module for loading the car dataset.
 '''
+import json
+import os
+import tempfile
 import zipfile
+from dataclasses import asdict
 from pathlib import Path
+from typing import Callable
 
 import pandas as pd
-import requests
 
 from ._base import PROJECT_NAME
+from ._download import download_file
+from ._schema import apply_schema
+from ._cache import Fingerprint, cached_read, compute_fingerprint
+from ._storage import load_table, make_filename, save_table_atomically
 
 _DATASET_URL = 'https://www.kaggle.com/api/v1/datasets/download/asinow/car-price-dataset'
-_TIMEOUT = 10
 
 _BASENAME = PROJECT_NAME + '_dataset'
 _COMPRESSED_FILENAME = _BASENAME + '.zip'
 _DATASET_FILENAME = _BASENAME + '.csv'
+_SNAPSHOT_FILENAME = make_filename(_BASENAME, 'parquet')
+_SNAPSHOT_SOURCE_FILENAME = _BASENAME + '.snapshot.json'
+_CACHE_FOLDER = 'cache'
 
 
-def _fetch_car_dataset(raw_dataset_path: Path, project_data_dir: Path) -> None:
+def _fetch_car_dataset(
+    raw_dataset_path: Path,
+    project_data_dir: Path,
+    url: str = _DATASET_URL,
+    sha256: str | None = None,
+) -> None:
     '''Fetches the car dataset from Kaggle and saves it to the data_dir.
+
+    The archive is streamed to disk, resuming any interrupted download, and
+    verified against the given SHA-256 before it is made visible.
     '''
     project_data_dir.mkdir(parents=True, exist_ok=True)
-    response = requests.get(_DATASET_URL, timeout=_TIMEOUT)
-    response.raise_for_status()
-    with open(raw_dataset_path, 'wb') as f:
-        f.write(response.content)
+    download_file(url, raw_dataset_path, expected_sha256=sha256)
 
 
 def _unpack_car_dataset(raw_dataset_path: Path, project_data_dir: Path) -> None:
     '''Unpacks the car dataset from the data_dir.
+
+    The files are extracted to a temporary folder and then atomically moved
+    into place.
+    '''
+    with tempfile.TemporaryDirectory(dir=project_data_dir) as tmp_dir:
+        with zipfile.ZipFile(raw_dataset_path, 'r') as zip_ref:
+            members = [
+                member for member in zip_ref.namelist()
+                if not member.endswith('/')
+            ]
+            zip_ref.extractall(tmp_dir, members=members)
+        for member in members:
+            target_path = project_data_dir / member
+            target_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(Path(tmp_dir) / member, target_path)
+
+
+def _read_car_dataset_from_archive(raw_dataset_path: Path) -> pd.DataFrame:
+    '''Reads the car dataset CSV straight out of the archive.
+
+    The member is decompressed while it is parsed, so nothing is written to
+    disk.
     '''
     with zipfile.ZipFile(raw_dataset_path, 'r') as zip_ref:
-        zip_ref.extractall(project_data_dir)
+        with zip_ref.open(_DATASET_FILENAME) as dataset_file:
+            dataset = pd.read_csv(dataset_file)
+    return dataset
 
 
-def _fetch_and_unpack_car_dataset(
-    project_data_dir: Path,
-    remove_original: bool,
+def _read(
+    filepath: Path,
+    reader: Callable[[Path], pd.DataFrame],
+    cache_dir: Path | None,
+) -> pd.DataFrame:
+    if cache_dir is None:
+        return reader(filepath)
+    return cached_read(filepath, reader, cache_dir)
+
+
+def _snapshot_source(
+    dataset_path: Path,
+    raw_dataset_path: Path,
+) -> Path | None:
+    '''Returns the file a snapshot is parsed from, if it is still there.'''
+    for source_path in (dataset_path, raw_dataset_path):
+        if source_path.exists():
+            return source_path
+    return None
+
+
+def _is_snapshot_fresh(
+    snapshot_path: Path,
+    source_path: Path | None,
+) -> bool:
+    '''Tells whether the snapshot was parsed from the current source file.
+
+    Without a source file (removed with remove_original=True), the snapshot
+    is the only copy of the dataset, and is always used.
+    '''
+    if not snapshot_path.exists():
+        return False
+    if source_path is None:
+        return True
+    record_path = snapshot_path.with_name(_SNAPSHOT_SOURCE_FILENAME)
+    if not record_path.exists():
+        return False
+    with open(record_path, 'r', encoding='utf8') as record_file:
+        record = json.load(record_file)
+    if record.pop('source') != source_path.name:
+        return False
+    previous = Fingerprint(**record)
+    fingerprint = compute_fingerprint(source_path, previous)
+    if fingerprint.sha256 != previous.sha256:
+        return False
+    if fingerprint != previous:
+        # Only the modification time changed: remember the new one, so the
+        # source is not hashed again.
+        _save_snapshot_source(snapshot_path, source_path, fingerprint)
+    return True
+
+
+def _save_snapshot_source(
+    snapshot_path: Path,
+    source_path: Path,
+    fingerprint: Fingerprint,
 ) -> None:
-    '''Fetches and unpacks the car dataset from Kaggle.
+    record = {'source': source_path.name, **asdict(fingerprint)}
+    record_path = snapshot_path.with_name(_SNAPSHOT_SOURCE_FILENAME)
+    with open(record_path, 'w', encoding='utf8') as record_file:
+        json.dump(record, record_file, indent=4)
+
+
+def fetch_car_dataset(
+    data_dir: str | Path,
+    url: str = _DATASET_URL,
+    sha256: str | None = None,
+) -> Path:
+    '''Makes sure the car dataset CSV is in the data_dir and returns its path.
     '''
+    project_data_dir = Path(data_dir) / PROJECT_NAME
+    dataset_path = project_data_dir / _DATASET_FILENAME
     raw_dataset_path = project_data_dir / _COMPRESSED_FILENAME
-    _fetch_car_dataset(raw_dataset_path, project_data_dir)
-    _unpack_car_dataset(raw_dataset_path, project_data_dir)
-    if remove_original:
-        raw_dataset_path.unlink()
+    if not dataset_path.exists():
+        if not raw_dataset_path.exists():
+            _fetch_car_dataset(raw_dataset_path, project_data_dir, url, sha256)
+        _unpack_car_dataset(raw_dataset_path, project_data_dir)
+    return dataset_path
 
 
 def load_car_dataset(
     data_dir: str | Path,
     remove_original: bool = False,
+    url: str = _DATASET_URL,
+    sha256: str | None = None,
+    extract: bool = True,
+    snapshot: bool = False,
+    compact: bool = False,
+    cache: bool = True,
 ) -> pd.DataFrame:
     '''Loads the car dataset from the data_dir.
+
+    If the dataset is not in the data_dir, it is downloaded from url and
+    checked against sha256, when given.
+
+    With extract=False, the CSV is parsed straight from the archive instead of
+    being extracted first. With snapshot=True, the parsed dataset is also
+    saved as a Parquet file, which is what later calls load, for as long as
+    the file it was parsed from does not change. The archive is
+    only removed (remove_original=True) once the dataset is kept in another
+    form, so it is never downloaded again.
+
+    With compact=True, the dataset is converted to its compact schema (see
+    `apply_schema`).
+
+    With cache=True, the parsed dataset is reused across calls and processes
+    for as long as its source file does not change (see `cached_read`).
     '''
     data_dir = Path(data_dir)
     project_data_dir = data_dir / PROJECT_NAME
     dataset_path = project_data_dir / _DATASET_FILENAME
-    if not dataset_path.exists():
-        _fetch_and_unpack_car_dataset(
-            project_data_dir,
-            remove_original=remove_original,
+    snapshot_path = project_data_dir / _SNAPSHOT_FILENAME
+    raw_dataset_path = project_data_dir / _COMPRESSED_FILENAME
+
+    source_path = _snapshot_source(dataset_path, raw_dataset_path)
+    if snapshot and _is_snapshot_fresh(snapshot_path, source_path):
+        dataset = load_table(snapshot_path, 'parquet')
+        return apply_schema(dataset) if compact else dataset
+
+    cache_dir = project_data_dir / _CACHE_FOLDER if cache else None
+
+    if dataset_path.exists():
+        dataset = _read(dataset_path, pd.read_csv, cache_dir)
+    else:
+        if not raw_dataset_path.exists():
+            _fetch_car_dataset(raw_dataset_path, project_data_dir, url, sha256)
+        if extract:
+            _unpack_car_dataset(raw_dataset_path, project_data_dir)
+            dataset = _read(dataset_path, pd.read_csv, cache_dir)
+        else:
+            dataset = _read(
+                raw_dataset_path,
+                _read_car_dataset_from_archive,
+                cache_dir,
+            )
+
+    if snapshot:
+        save_table_atomically(dataset, snapshot_path, 'parquet')
+        source_path = _snapshot_source(dataset_path, raw_dataset_path)
+        _save_snapshot_source(
+            snapshot_path,
+            source_path,
+            compute_fingerprint(source_path),
         )
-    dataset = pd.read_csv(dataset_path)
+
+    if remove_original and (extract or snapshot):
+        raw_dataset_path.unlink(missing_ok=True)
+
+    if compact:
+        dataset = apply_schema(dataset)
+
     return dataset
@@ -0,0 +1,82 @@
+'''Module with the schema of the car dataset.
+'''
+import pandas as pd
+
+_ARROW_STRING = pd.StringDtype('pyarrow')
+
+CATEGORICAL_COLUMNS = [
+    'Brand',
+    'Model',
+    'Fuel_Type',
+    'Transmission',
+]
+
+NUMERICAL_COLUMNS = [
+    'Year',
+    'Engine_Size',
+    'Mileage',
+    'Doors',
+    'Owner_Count',
+    'Price',
+]
+
+
+def _to_category(column: pd.Series) -> pd.Series:
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column
+    categories = pd.Index(column.dropna().unique(), dtype=_ARROW_STRING)
+    dtype = pd.CategoricalDtype(categories.sort_values())
+    return column.astype(_ARROW_STRING).astype(dtype)
+
+
+def _downcast(column: pd.Series) -> pd.Series:
+    if pd.api.types.is_integer_dtype(column.dtype):
+        return pd.to_numeric(column, downcast='integer')
+    return pd.to_numeric(column, downcast='float')
+
+
+def apply_schema(dataset: pd.DataFrame) -> pd.DataFrame:
+    '''Converts the car dataset to its compact schema.
+
+    Categorical columns become `category` with Arrow-backed string categories,
+    numerical columns are downcast to the smallest dtype that holds their
+    values, and any other text column becomes an Arrow-backed string.
+    '''
+    columns = {}
+    for name, column in dataset.items():
+        if name in CATEGORICAL_COLUMNS:
+            columns[name] = _to_category(column)
+        elif name in NUMERICAL_COLUMNS:
+            columns[name] = _downcast(column)
+        elif pd.api.types.is_string_dtype(column.dtype):
+            columns[name] = column.astype(_ARROW_STRING)
+        else:
+            columns[name] = column
+    return pd.DataFrame(columns, index=dataset.index)
+
+
+def memory_usage_report(
+    original: pd.DataFrame,
+    compact: pd.DataFrame,
+) -> pd.DataFrame:
+    '''Compares the memory usage, in bytes, of two versions of a dataset.
+
+    Returns one row per column, plus a "Total" row, with the dtypes and
+    the deep memory usage of both versions and the reduction ratio.
+    '''
+    original_usage = original.memory_usage(deep=True, index=False)
+    compact_usage = compact.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        'original_dtype': original.dtypes.astype(str),
+        'compact_dtype': compact.dtypes.astype(str),
+        'original_bytes': original_usage,
+        'compact_bytes': compact_usage,
+    })
+    report.loc['Total'] = [
+        '',
+        '',
+        original_usage.sum(),
+        compact_usage.sum(),
+    ]
+    report['ratio'] = report['original_bytes'] / report['compact_bytes']
+    return report
@@ -0,0 +1,93 @@
+'''Module for storing train/test splits as row positions of the dataset.
+'''
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+_TRAIN_INDICES_FILENAME = 'train_indices.npy'
+_TEST_INDICES_FILENAME = 'test_indices.npy'
+_SOURCE_FILENAME = 'source.json'
+
+
+def normalize_column(column: pd.Series) -> pd.Series:
+    '''Casts a column to the dtype it has without the compact schema.
+
+    Integers become int64 and floats float32, so that hashes of the column
+    are the same with and without the compact schema.
+    '''
+    if pd.api.types.is_integer_dtype(column.dtype):
+        return column.astype('int64')
+    if pd.api.types.is_float_dtype(column.dtype):
+        return column.astype('float32')
+    return column
+
+
+def dataset_fingerprint(dataset: pd.DataFrame) -> str:
+    '''Computes a fingerprint of the content of a dataset.
+
+    Integer columns are hashed as int64, float columns as float32 and
+    categorical columns as their values, so the fingerprint is the same with
+    and without the compact schema.
+    '''
+    columns = {
+        name: normalize_column(column) for name, column in dataset.items()
+    }
+    row_hashes = pd.util.hash_pandas_object(
+        pd.DataFrame(columns),
+        index=False,
+    )
+    sha256 = hashlib.sha256()
+    sha256.update(json.dumps(list(map(str, dataset.columns))).encode('utf8'))
+    sha256.update(row_hashes.to_numpy().tobytes())
+    return sha256.hexdigest()
+
+
+def save_split_indices(
+    train_indices: np.ndarray,
+    test_indices: np.ndarray,
+    fingerprint: str,
+    basepath: Path,
+) -> None:
+    '''Saves the train and test row positions and the source fingerprint.
+    '''
+    np.save(basepath / _TRAIN_INDICES_FILENAME, train_indices)
+    np.save(basepath / _TEST_INDICES_FILENAME, test_indices)
+    n_rows = len(train_indices) + len(test_indices)
+    source = {'fingerprint': fingerprint, 'n_rows': n_rows}
+    with open(basepath / _SOURCE_FILENAME, 'w', encoding='utf8') as source_file:
+        json.dump(source, source_file, indent=4)
+
+
+def load_split_indices(basepath: Path) -> tuple[np.ndarray, np.ndarray, str]:
+    '''Loads the train and test row positions and the source fingerprint.
+
+    The positions are memory-mapped, not read into memory.
+    '''
+    train_indices = np.load(basepath / _TRAIN_INDICES_FILENAME, mmap_mode='r')
+    test_indices = np.load(basepath / _TEST_INDICES_FILENAME, mmap_mode='r')
+    with open(basepath / _SOURCE_FILENAME, 'r', encoding='utf8') as source_file:
+        source = json.load(source_file)
+    return train_indices, test_indices, source['fingerprint']
+
+
+def take_split(
+    dataset: pd.DataFrame,
+    train_indices: np.ndarray,
+    test_indices: np.ndarray,
+    fingerprint: str,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    '''Rebuilds the train and test datasets from their row positions.
+
+    Raises a ValueError if the dataset is not the one the positions were
+    computed from.
+    '''
+    if dataset_fingerprint(dataset) != fingerprint:
+        raise ValueError(
+            'The dataset does not match the one the split was computed from.'
+        )
+    train_dataset = dataset.take(train_indices).reset_index(drop=True)
+    test_dataset = dataset.take(test_indices).reset_index(drop=True)
+    return train_dataset, test_dataset
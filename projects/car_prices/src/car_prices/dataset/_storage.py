@@ -0,0 +1,158 @@
+'''Module for storing tables in CSV, Parquet or Feather (Arrow IPC) format.
+'''
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+FiltersType = list[tuple[str, str, Any]] | list[list[tuple[str, str, Any]]]
+
+DATASET_FORMATS = [
+    'csv',
+    'parquet',
+    'feather',
+]
+
+_EXTENSIONS = {
+    'csv': '.csv',
+    'parquet': '.parquet',
+    'feather': '.feather',
+}
+
+_ARROW_FORMATS = {
+    'parquet': 'parquet',
+    'feather': 'ipc',
+}
+
+_ROW_GROUP_SIZE = 64 * 1024
+
+
+def _check_format(dataset_format: str) -> None:
+    if dataset_format not in DATASET_FORMATS:
+        raise ValueError(
+            f'Unknown dataset format: {dataset_format!r}. '
+            f'Expected one of {DATASET_FORMATS}.'
+        )
+
+
+def make_filename(basename: str, dataset_format: str) -> str:
+    '''Makes the filename of a table stored in the given format.
+    '''
+    _check_format(dataset_format)
+    return basename + _EXTENSIONS[dataset_format]
+
+
+def _to_arrow(dataset: pd.DataFrame) -> pa.Table:
+    return pa.Table.from_pandas(dataset, preserve_index=False)
+
+
+def _filter_expression(filters: FiltersType | None) -> ds.Expression | None:
+    if not filters:
+        return None
+    return pq.filters_to_expression(filters)
+
+
+def _filter_columns(filters: FiltersType | None) -> list[str]:
+    if not filters:
+        return []
+    # Either a list of conditions, or a list (OR) of lists (AND) of them.
+    conjunctions = filters if isinstance(filters[0], list) else [filters]
+    return list(dict.fromkeys(
+        column for conjunction in conjunctions for column, _, _ in conjunction
+    ))
+
+
+def apply_filters(
+    dataset: pd.DataFrame,
+    filters: FiltersType | None,
+) -> pd.DataFrame:
+    '''Keeps only the rows of a loaded dataframe that match the filters.
+    '''
+    expression = _filter_expression(filters)
+    if expression is None:
+        return dataset
+    table = _to_arrow(dataset).filter(expression)
+    return table.to_pandas()
+
+
+def save_table(
+    dataset: pd.DataFrame,
+    filepath: Path,
+    dataset_format: str = 'csv',
+) -> None:
+    '''Saves a dataframe to filepath in the given format.
+
+    Parquet files are written in row groups so that filters can skip whole
+    groups on load.
+    '''
+    _check_format(dataset_format)
+    if dataset_format == 'csv':
+        dataset.to_csv(filepath, index=False)
+    elif dataset_format == 'parquet':
+        pq.write_table(
+            _to_arrow(dataset),
+            filepath,
+            row_group_size=_ROW_GROUP_SIZE,
+        )
+    else:
+        with pa.OSFile(str(filepath), 'wb') as sink:
+            table = _to_arrow(dataset)
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table, max_chunksize=_ROW_GROUP_SIZE)
+
+
+def save_table_atomically(
+    dataset: pd.DataFrame,
+    filepath: Path,
+    dataset_format: str = 'csv',
+) -> None:
+    '''Saves a dataframe to filepath so that readers never see a partial file.
+
+    The table is written to a temporary file in the same folder, which is
+    then renamed to filepath.
+    '''
+    with tempfile.NamedTemporaryFile(
+            dir=filepath.parent,
+            suffix=filepath.suffix,
+            delete=False,
+    ) as tmp_file:
+        tmp_path = Path(tmp_file.name)
+    try:
+        save_table(dataset, tmp_path, dataset_format)
+        os.replace(tmp_path, filepath)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def load_table(
+    filepath: Path,
+    dataset_format: str = 'csv',
+    columns: list[str] | None = None,
+    filters: FiltersType | None = None,
+) -> pd.DataFrame:
+    '''Loads a dataframe stored in the given format from filepath.
+
+    Only the requested columns are read. Filters follow the pandas/pyarrow
+    convention, e.g. [('Year', '>=', 2010)], and are pushed down to the
+    reader for Parquet and Feather files, so row groups whose statistics do
+    not match are never decoded. For CSV files the filters are applied after
+    parsing.
+    '''
+    _check_format(dataset_format)
+    if dataset_format == 'csv':
+        # The filter columns are read too, and dropped once filtered.
+        usecols = None if columns is None \
+            else list(dict.fromkeys(columns + _filter_columns(filters)))
+        dataset = pd.read_csv(filepath, usecols=usecols)
+        dataset = apply_filters(dataset, filters)
+        return dataset if columns is None else dataset[columns]
+
+    expression = _filter_expression(filters)
+    arrow_dataset = ds.dataset(filepath, format=_ARROW_FORMATS[dataset_format])
+    table = arrow_dataset.to_table(columns=columns, filter=expression)
+    return table.to_pandas()
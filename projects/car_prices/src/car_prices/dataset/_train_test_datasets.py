@@ -4,42 +4,42 @@ from pathlib import Path
 
 import pandas as pd
 
-_TRAIN_FILENAME = 'train.csv'
-_TEST_FILENAME = 'test.csv'
+from ._storage import FiltersType, load_table, make_filename, save_table
 
-
-def _save_dataset(
-    dataset: pd.DataFrame,
-    filepath: Path,
-) -> None:
-    dataset.to_csv(filepath, index=False)
-
-
-def _load_dataset(filepath: Path,) -> pd.DataFrame:
-    return pd.read_csv(filepath)
+_TRAIN_BASENAME = 'train'
+_TEST_BASENAME = 'test'
 
 
 def save_datasets(
     train_dataset: pd.DataFrame,
     test_dataset: pd.DataFrame,
     basepath: Path,
+    dataset_format: str = 'csv',
 ) -> None:
     '''Saves the train and test datasets to the data_dir.
     '''
-    train_filepath = basepath / _TRAIN_FILENAME
-    _save_dataset(train_dataset, train_filepath)
+    train_filepath = basepath / make_filename(_TRAIN_BASENAME, dataset_format)
+    save_table(train_dataset, train_filepath, dataset_format)
 
-    test_filepath = basepath / _TEST_FILENAME
-    _save_dataset(test_dataset, test_filepath)
+    test_filepath = basepath / make_filename(_TEST_BASENAME, dataset_format)
+    save_table(test_dataset, test_filepath, dataset_format)
 
 
-def load_datasets(basepath: Path) -> tuple[pd.DataFrame, pd.DataFrame]:
+def load_datasets(
+    basepath: Path,
+    dataset_format: str = 'csv',
+    columns: list[str] | None = None,
+    filters: FiltersType | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
     '''Loads the train and test datasets from the data_dir.
+
+    Only the given columns and the rows matching the given filters are
+    loaded (see `load_table`).
     '''
-    train_filepath = basepath / _TRAIN_FILENAME
-    train_dataset = _load_dataset(train_filepath)
+    train_filepath = basepath / make_filename(_TRAIN_BASENAME, dataset_format)
+    train_dataset = load_table(train_filepath, dataset_format, columns, filters)
 
-    test_filepath = basepath / _TEST_FILENAME
-    test_dataset = _load_dataset(test_filepath)
+    test_filepath = basepath / make_filename(_TEST_BASENAME, dataset_format)
+    test_dataset = load_table(test_filepath, dataset_format, columns, filters)
 
     return train_dataset, test_dataset
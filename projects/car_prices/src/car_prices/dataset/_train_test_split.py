@@ -1,8 +1,16 @@
 '''Module for splitting the dataset into train and test datasets.
 '''
+import hashlib
+from typing import Iterable, Iterator
+
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 
+from ._split_indices import normalize_column
+
+SPLIT_STRATEGIES = ['random', 'hash']
+
 
 def split_train_test(
     dataset: pd.DataFrame,
@@ -18,3 +26,84 @@ def split_train_test(
     )
 
     return train_dataset, test_dataset
+
+
+def split_train_test_indices(
+    n_rows: int,
+    test_size: float,
+    random_state: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    ''' Splits the row positions of a dataset into train and test positions.
+
+    The positions select the same rows as `split_train_test` with the same
+    arguments, and are stored as int32 arrays.
+    '''
+    positions = np.arange(n_rows, dtype=np.int32)
+    train_indices, test_indices = train_test_split(
+        positions,
+        test_size=test_size,
+        random_state=random_state,
+    )
+    return train_indices, test_indices
+
+
+def hash_test_mask(
+    dataset: pd.DataFrame,
+    test_size: float,
+    random_state: int,
+    key_column: str | None = None,
+) -> np.ndarray:
+    '''Tells which rows of the dataset belong to the test set, by hashing.
+
+    A row is in the test set when the hash of its key, salted with the
+    random_state, falls in the first test_size fraction of the hash range.
+    The key is the key_column, or the whole row if it is None. Each row is
+    assigned independently of the others, so appending rows never moves the
+    existing ones, and the mask can be computed chunk by chunk.
+    '''
+    if key_column is None:
+        keys = pd.DataFrame({
+            name: normalize_column(column)
+            for name, column in dataset.items()
+        })
+    else:
+        keys = normalize_column(dataset[key_column])
+    salt = hashlib.sha256(str(random_state).encode('utf8')).hexdigest()[:16]
+    hashes = pd.util.hash_pandas_object(keys, index=False, hash_key=salt)
+    # The top 53 bits of the hash, as a uniform number in [0, 1).
+    fractions = (hashes.to_numpy() >> np.uint64(11)) / 2.0**53
+    return fractions < test_size
+
+
+def split_train_test_by_hash(
+    dataset: pd.DataFrame,
+    test_size: float,
+    random_state: int,
+    key_column: str | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    ''' Splits the dataset into train and test datasets by hashing a key.
+
+    The rows keep their order. See `hash_test_mask` for the assignment.
+    '''
+    test_mask = hash_test_mask(dataset, test_size, random_state, key_column)
+    return dataset[~test_mask], dataset[test_mask]
+
+
+def split_train_test_chunks_by_hash(
+    chunks: Iterable[pd.DataFrame],
+    test_size: float,
+    random_state: int,
+    key_column: str | None = None,
+) -> Iterator[tuple[pd.DataFrame, pd.DataFrame]]:
+    ''' Splits each chunk of a dataset into train and test chunks.
+
+    The concatenated train and test chunks are the same as the train and
+    test datasets of `split_train_test_by_hash` on the whole dataset.
+    '''
+    for chunk in chunks:
+        yield split_train_test_by_hash(
+            chunk,
+            test_size,
+            random_state,
+            key_column,
+        )